@@ -1,3 +1,4 @@
+import sys
 from pathlib import Path
 from decouple import config
 import toml
@@ -7,6 +8,9 @@ from statsmodels.tsa.arima.model import ARIMA
 from warnings import filterwarnings
 from tqdm import tqdm
 
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+from models.panel_dataset import PanelDataset
+
 # Ignore convergence warnings from ARIMA
 filterwarnings("ignore")
 
@@ -87,7 +91,7 @@ OUTPUT_DIR = config("OUTPUT_DIR", cast=Path, default=Path(__file__).parent.paren
 datasets_info = toml.load(DATA_DIR / "ftsfa_datasets_paths.toml")
 
 file_path = DATA_DIR / datasets_info["treas_yield_curve_zero_coupon"]
-df = pd.read_parquet(file_path)
+panel = PanelDataset.from_parquet(file_path)
 
 
 # Define forecasting parameters
@@ -97,22 +101,18 @@ seasonality = 5  # 5 for weekly patterns (business days)
 arima_order = (1, 1, 1)  # Default ARIMA order, can be tuned
 
 # Process each entity separately
-entities = df['entity'].unique()
 mase_values = []
 
-print(f"Running ARIMA forecasting for {len(entities)} entities...")
+print(f"Running ARIMA forecasting for {len(panel)} entities...")
 
-for entity in tqdm(entities):
-    # Filter data for the current entity
-    entity_data = df[df['entity'] == entity].sort_values('date')
-    entity_data = entity_data.dropna()
+for idx in tqdm(range(len(panel))):
+    # Values of the current entity, already sorted by date
+    values = panel.get_values(idx)
+    values = values[~np.isnan(values)]
     
-    if len(entity_data) <= 10:  # Skip entities with too few observations
+    if len(values) <= 10:  # Skip entities with too few observations
         continue
     
-    # Extract values
-    values = entity_data['value'].values
-    
     # Determine train/test split
     n = len(values)
     test_size = max(1, int(n * test_ratio))
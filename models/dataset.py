@@ -1,7 +1,15 @@
 from typing import Union, List
+from contextlib import ExitStack
 import datetime
+import hashlib
+import json
+import os
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from models.utils import _calc_periods_per_year
+from models.table_cache import TableCache, get_table_size
 
 
 FREQUENCY_SEASONAL_MAP = {
@@ -19,7 +27,10 @@ PATH_DATA_OUTPUT = "_data"
 
 
 class Dataset:
-    all_tables = {}
+    # Parquet columns read so far, keyed by (path, column, date range) and
+    # evicted least recently used first once over the memory budget
+    all_tables = TableCache()
+    parquet_schemas = {}
 
     @classmethod
     def get_in_memory_tables(cls):
@@ -27,21 +38,164 @@ class Dataset:
 
     @classmethod
     def reset_tables_in_memory(cls):
-        cls.all_tables = {}
+        cls.all_tables = TableCache(cls.all_tables.max_bytes)
+        cls.parquet_schemas = {}
+
+    @classmethod
+    def set_tables_memory_budget(cls, max_bytes):
+        cls.all_tables.set_max_bytes(max_bytes)
+
+    @classmethod
+    def get_tables_cache_stats(cls):
+        return cls.all_tables.get_stats()
+
+    @classmethod
+    def _get_parquet_schema(cls, path_name):
+        # Read from the file footer, without reading any data
+        if path_name not in cls.parquet_schemas:
+            cls.parquet_schemas[path_name] = pq.read_schema(path_name + ".parquet")
+        return cls.parquet_schemas[path_name]
+
+    @classmethod
+    def _get_parquet_columns(cls, path_name):
+        # Data columns of the Parquet file, without the stored pandas index
+        schema = cls._get_parquet_schema(path_name)
+        index_columns = (schema.pandas_metadata or {}).get("index_columns", [])
+        return [column for column in schema.names if column not in index_columns]
+
+    @staticmethod
+    def get_date_filters(schema, date_name, filter_start_date, filter_end_date):
+        """
+        Filters on the date field, in the format of the 'filters' of
+        `pd.read_parquet`, so that the reader skips the row groups whose
+        statistics are out of range. None if there is nothing to filter or the
+        field is not a Parquet timestamp or date.
+        """
+        if filter_start_date is None and filter_end_date is None:
+            return None
+        if date_name not in schema.names:
+            return None
+        field_type = schema.field(date_name).type
+        if not (pa.types.is_timestamp(field_type) or pa.types.is_date(field_type)):
+            return None
+
+        def to_field_value(date):
+            date = pd.Timestamp(date)
+            if pa.types.is_date(field_type):
+                return date.date()
+            if field_type.tz is not None and date.tz is None:
+                return date.tz_localize(field_type.tz)
+            return date
+
+        filters = []
+        if filter_start_date is not None:
+            filters.append((date_name, ">=", to_field_value(filter_start_date)))
+        if filter_end_date is not None:
+            filters.append((date_name, "<=", to_field_value(filter_end_date)))
+        return filters
+
+    @classmethod
+    def _get_date_range(cls, path_name, filter_start_date, filter_end_date):
+        # Date filters of a table and the date range they cover in cache keys
+        schema = cls._get_parquet_schema(path_name)
+        date_names = [name for name in schema.names if name.lower() == "date"]
+        filters = cls.get_date_filters(
+            schema,
+            date_names[0] if date_names else None,
+            filter_start_date,
+            filter_end_date,
+        )
+        if filters is None:
+            return None, None
+        date_range = tuple(
+            None if date is None else pd.Timestamp(date)
+            for date in (filter_start_date, filter_end_date)
+        )
+        return filters, date_range
+
+    @classmethod
+    def _get_column_key(cls, path_name, column, date_range):
+        # Cache key of the full column if in memory, else of the filtered one
+        full_key = (path_name, column, None)
+        if full_key in cls.all_tables:
+            return full_key
+        return (path_name, column, date_range)
+
+    @classmethod
+    def _read_columns(
+        cls, path_name, columns, filter_start_date=None, filter_end_date=None
+    ):
+        """
+        Reads 'columns' of a Parquet file, projected to those columns and the
+        date column, in a single read for the columns not already in memory.
+        Date filters are pushed down to the reader, unless the full columns are
+        already in memory.
+
+        :return: Dict of column name to Series indexed by date.
+        """
+        filters, date_range = cls._get_date_range(
+            path_name, filter_start_date, filter_end_date
+        )
+        variables = {
+            column: cls.all_tables.get(
+                cls._get_column_key(path_name, column, date_range)
+            )
+            for column in columns
+        }
+        missing_columns = [column for column, v in variables.items() if v is None]
+        if missing_columns:
+            date_columns = [
+                column
+                for column in cls._get_parquet_columns(path_name)
+                if column.lower() == "date" and column not in missing_columns
+            ]
+            table = pd.read_parquet(
+                path_name + ".parquet",
+                columns=missing_columns + date_columns[:1],
+                filters=filters,
+            )
+            if date_columns:
+                table = table.set_index(date_columns[0])
+            # Each column gets its own buffer, so that evicting it frees its
+            # memory, while the date index shared by the columns of the read is
+            # counted once, split between them
+            index_share = table.index.memory_usage(deep=True) / len(missing_columns)
+            for column in missing_columns:
+                variables[column] = table[column].copy()
+                cls.all_tables.set(
+                    (path_name, column, date_range),
+                    variables[column],
+                    n_bytes=get_table_size(variables[column], index=False)
+                    + index_share,
+                )
+        return variables
 
     @classmethod
     def get_in_memory_tables_names(cls):
-        return list(cls.all_tables.keys())
+        return list(dict.fromkeys(path_name for path_name, *_ in cls.all_tables))
 
     @classmethod
     def get_table_from_memory(cls, table_name):
+        # Table made of the columns of 'table_name' that are in memory
         if table_name.endswith(".parquet"):
             table_name = table_name[:-8]
-        table = cls.all_tables.get(table_name)
-        if table is None:
-            table = cls.all_tables.get(PATH_DATA_OUTPUT + "/" + table_name)
-        if table is None:
+        for path_name in [table_name, PATH_DATA_OUTPUT + "/" + table_name]:
+            # Full columns last, so they take precedence over date filtered ones
+            keys = sorted(
+                (key for key in cls.all_tables if key[0] == path_name),
+                key=lambda key: key[2] is None,
+            )
+            columns = {key[1]: cls.all_tables[key] for key in keys}
+            if columns:
+                break
+        else:
             raise ValueError(f"Table {table_name} not found in memory")
+        parquet_columns = cls._get_parquet_schema(path_name).names
+        table = pd.DataFrame(columns)[
+            [column for column in parquet_columns if column in columns]
+        ]
+        if table.index.name in parquet_columns:
+            table = table.reset_index()
         return table
 
     @classmethod
@@ -54,18 +208,23 @@ class Dataset:
         time_frequency=None,
         parquet_path=None,
     ):
+        # Date filters are pushed down to the Parquet reads of y and X
+        filter_start_date = cls._validate_datetime(
+            filter_start_date, "filter_start_date"
+        )
+        filter_end_date = cls._validate_datetime(filter_end_date, "filter_end_date")
         if parquet_path is not None:
-            y = cls._get_variable(y, return_path=False)
+            y = cls._get_variable(y, False, filter_start_date, filter_end_date)
         else:
-            y, parquet_path = cls._get_variable(y, return_path=True)
+            y, parquet_path = cls._get_variable(
+                y, True, filter_start_date, filter_end_date
+            )
         if X is None:
             X_frame = None
         else:
             if isinstance(X, str):
                 X = [X]
-            X_frame = pd.DataFrame()
-            for x in X:
-                X_frame = X_frame.join(cls._get_variable(x), how="outer")
+            X_frame = cls._get_variables(X, filter_start_date, filter_end_date)
         return cls(
             y, X_frame, filter_start_date, filter_end_date, time_frequency, parquet_path
         )
@@ -81,22 +240,57 @@ class Dataset:
         ignore_columns: List[str] = [],
     ):
         path_name = PATH_DATA_OUTPUT + "/" + y_table
-        if cls.all_tables.get(path_name) is None:
-            cls.all_tables[path_name] = pd.read_parquet(path_name + ".parquet")
+        filter_start_date = cls._validate_datetime(
+            filter_start_date, "filter_start_date"
+        )
+        filter_end_date = cls._validate_datetime(filter_end_date, "filter_end_date")
+        _, date_range = cls._get_date_range(
+            path_name, filter_start_date, filter_end_date
+        )
+        columns = [
+            y
+            for y in cls._get_parquet_columns(path_name)
+            if y.lower() not in ignore_columns and y.lower() != "date"
+        ]
         datasets_from_table = []
-        for y in list(cls.all_tables[path_name].columns):
-            if y.lower() in ignore_columns or y.lower() == "date":
-                continue
-            new_dataset = cls.from_parquet(
-                y_table + "/" + y, X, filter_start_date, filter_end_date, time_frequency
-            )
-            new_dataset.parquet_path = path_name
-            datasets_from_table.append(new_dataset)
+        # Every y column is read at once and pinned, under the key it is read
+        # from, so that reading X cannot evict them before their dataset is built
+        with ExitStack() as stack:
+            for y in columns:
+                stack.enter_context(
+                    cls.all_tables.pinned(cls._get_column_key(path_name, y, date_range))
+                )
+            cls._read_columns(path_name, columns, filter_start_date, filter_end_date)
+            for y in columns:
+                new_dataset = cls.from_parquet(
+                    y_table + "/" + y,
+                    X,
+                    filter_start_date,
+                    filter_end_date,
+                    time_frequency,
+                )
+                new_dataset.parquet_path = path_name
+                datasets_from_table.append(new_dataset)
         return datasets_from_table
 
     def get_parquet_path(self):
         return self.parquet_path
 
+    def get_fingerprint(self):
+        # Hashes the raw buffers of the values, index and column names of y and X
+        digest = hashlib.blake2b(digest_size=16)
+        for time_series in (self.y, self.X):
+            if time_series is None:
+                digest.update(b"None")
+                continue
+            digest.update("\x1f".join(time_series.columns).encode())
+            digest.update(memoryview(np.ascontiguousarray(time_series.index.asi8)))
+            values = time_series.to_numpy()
+            if values.dtype == object:
+                values = values.astype(str)
+            digest.update(memoryview(np.ascontiguousarray(values)))
+        return digest.hexdigest()
+
     def get_y_name(self):
         if isinstance(self.y, pd.DataFrame):
             return (
@@ -107,16 +301,21 @@ class Dataset:
         else:
             return self.y.name
 
-    @classmethod
-    def _get_variable(cls, path, return_path=False):
+    @staticmethod
+    def _split_variable_path(path):
         variable_name = path.split("/")[-1].split("\\")[-1]
         path_name = PATH_DATA_OUTPUT + "/" + "/".join(path.split("/")[:-1])
-        if cls.all_tables.get(path_name) is None:
-            cls.all_tables[path_name] = pd.read_parquet(path_name + ".parquet")
-        if variable_name in cls.all_tables[path_name].columns:
-            variable = cls.all_tables[path_name][variable_name]
-            if "date" in list(cls.all_tables[path_name].columns.str.lower()):
-                variable.index = cls.all_tables[path_name]["date"]
+        return path_name, variable_name
+
+    @classmethod
+    def _get_variable(
+        cls, path, return_path=False, filter_start_date=None, filter_end_date=None
+    ):
+        path_name, variable_name = cls._split_variable_path(path)
+        if variable_name in cls._get_parquet_columns(path_name):
+            variable = cls._read_columns(
+                path_name, [variable_name], filter_start_date, filter_end_date
+            )[variable_name]
             if not return_path:
                 return variable
             else:
@@ -124,6 +323,35 @@ class Dataset:
         else:
             raise ValueError(f"Variable {variable_name} not found in {path_name}")
 
+    @classmethod
+    def _get_variables(cls, paths, filter_start_date=None, filter_end_date=None):
+        """
+        Reads each table once with all of its requested columns and outer joins
+        the columns of every table in a single alignment.
+
+        :return: DataFrame with one column per path, in the order of 'paths'.
+        """
+        columns_by_table = {}
+        for path in paths:
+            path_name, variable_name = cls._split_variable_path(path)
+            if variable_name not in cls._get_parquet_columns(path_name):
+                raise ValueError(f"Variable {variable_name} not found in {path_name}")
+            columns_by_table.setdefault(path_name, []).append(variable_name)
+        variables = {
+            path_name: cls._read_columns(
+                path_name, columns, filter_start_date, filter_end_date
+            )
+            for path_name, columns in columns_by_table.items()
+        }
+        return pd.concat(
+            [
+                variables[path_name][variable_name]
+                for path_name, variable_name in map(cls._split_variable_path, paths)
+            ],
+            axis=1,
+            join="outer",
+        )
+
     def __init__(
         self,
         y,
@@ -132,6 +360,7 @@ class Dataset:
         filter_end_date: Union[datetime.date, datetime.datetime] = None,
         time_frequency=None,
         parquet_path=None,
+        strict_X: bool = False,
     ):
         self.y = self.organize_time_series(
             y,
@@ -139,11 +368,30 @@ class Dataset:
             self._validate_datetime(filter_end_date, "filter_end_date"),
             enforce_not_none=True,
         )
-        self.X = self.organize_time_series(X, filter_start_date, filter_end_date)
+        self.X = self._align_X(self.organize_time_series(X, None, None), strict_X)
+        self.X_values = None
         self.time_frequency = self._validate_time_frequency(time_frequency)
         self.y_pred = None
         self.parquet_path = parquet_path
 
+    def _align_X(self, X, strict=False):
+        # X is aligned to the dates of y once, so that y and X of every division
+        # are sliced by the same offsets. Dates of y missing from X are left as
+        # missing rows, unless 'strict', which requires X to cover every date of
+        # y with numeric columns
+        if X is None:
+            return None
+        if strict:
+            is_missing = ~self.y.index.isin(X.index)
+            if is_missing.any():
+                raise ValueError(
+                    f"'X' has no observations for {is_missing.sum()} dates of 'y', "
+                    f"starting at {self.y.index[is_missing][0]}."
+                )
+            if not all(pd.api.types.is_numeric_dtype(d) for d in X.dtypes):
+                raise ValueError("'X' must only have numeric columns.")
+        return X.reindex(self.y.index)
+
     def _validate_time_frequency(self, time_frequency):
         if time_frequency == "M":
             return "ME"
@@ -172,9 +420,75 @@ class Dataset:
         new_dataset = cls.__new__(cls)
         new_dataset.y = y
         new_dataset.X = X
+        new_dataset.X_values = None
         new_dataset.time_frequency = time_frequency
+        new_dataset.y_pred = None
+        new_dataset.parquet_path = None
         return new_dataset
 
+    def to_memmap(self, path):
+        """
+        Writes the values and dates of y and X as NumPy files in the directory
+        'path', to be opened with `from_memmap`.
+        """
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "index.npy"), self.y.index.asi8)
+        np.save(os.path.join(path, "y.npy"), self.y.to_numpy(dtype=float))
+        if self.X is not None:
+            np.save(os.path.join(path, "X.npy"), self.get_X_values())
+        metadata = {
+            "y_columns": list(self.y.columns),
+            "X_columns": None if self.X is None else list(self.X.columns),
+            "index_name": self.y.index.name,
+            "tz": None if self.y.index.tz is None else str(self.y.index.tz),
+            "time_frequency": self.time_frequency,
+            "parquet_path": self.parquet_path,
+        }
+        with open(os.path.join(path, "metadata.json"), "w") as f:
+            json.dump(metadata, f)
+
+    @classmethod
+    def from_memmap(cls, path):
+        """
+        Opens a Dataset written by `to_memmap`. The values and dates of y and X
+        are read-only views of memory-mapped files, so opening is near instant
+        and processes opening the same files share them instead of each holding
+        a copy. Views of the dataset, and so divisions, are also zero-copy.
+        """
+        with open(os.path.join(path, "metadata.json")) as f:
+            metadata = json.load(f)
+        index = np.load(os.path.join(path, "index.npy"), mmap_mode="r")
+        index = pd.DatetimeIndex(index.view("M8[ns]"), name=metadata["index_name"])
+        if metadata["tz"] is not None:
+            index = index.tz_localize("UTC").tz_convert(metadata["tz"])
+        y = pd.DataFrame(
+            np.load(os.path.join(path, "y.npy"), mmap_mode="r"),
+            index=index,
+            columns=metadata["y_columns"],
+            copy=False,
+        )
+        X, X_values = None, None
+        if metadata["X_columns"] is not None:
+            X_values = np.load(os.path.join(path, "X.npy"), mmap_mode="r")
+            X = pd.DataFrame(
+                X_values, index=index, columns=metadata["X_columns"], copy=False
+            )
+        dataset = cls.from_organized_time_series(y, X, metadata["time_frequency"])
+        dataset.X_values = X_values
+        dataset.parquet_path = metadata["parquet_path"]
+        return dataset
+
+    def view(self, start, end):
+        # Positional slices of the organized series are views, not copies
+        dataset = self.from_organized_time_series(
+            self.y.iloc[start:end],
+            None if self.X is None else self.X.iloc[start:end],
+            self.time_frequency,
+        )
+        if self.X is not None:
+            dataset.X_values = self.get_X_values()[start:end]
+        return dataset
+
     @staticmethod
     def _validate_datetime(date, date_name):
         if isinstance(date, str):
@@ -197,10 +511,11 @@ class Dataset:
     def create_from_y(cls, y, time_frequency=None):
         return cls.from_organized_time_series(y, None, time_frequency)
 
-    def set_X(self, X):
-        self.X = self.organize_time_series(
-            X, filter_start_date=self.y.index[0], filter_end_date=self.y.index[-1]
-        )
+    def set_X(self, X, organize=True, strict=False):
+        if organize:
+            X = self.organize_time_series(X, None, None)
+        self.X = self._align_X(X, strict)
+        self.X_values = None
 
     def get_y(self):
         return self.y
@@ -208,6 +523,17 @@ class Dataset:
     def get_X(self):
         return self.X
 
+    def get_X_values(self):
+        # Array of X, converted once and shared by every view of the dataset
+        if self.X is None:
+            return None
+        if self.X_values is None:
+            if all(pd.api.types.is_numeric_dtype(d) for d in self.X.dtypes):
+                self.X_values = self.X.to_numpy(dtype=float)
+            else:
+                self.X_values = self.X.to_numpy()
+        return self.X_values
+
     def set_y_pred(self, y_pred, organize=False):
         if organize:
             self.y_pred = self.organize_time_series(
@@ -230,26 +556,38 @@ class Dataset:
             return None
         if isinstance(time_series, pd.Series):
             time_series = time_series.to_frame()
-        time_series.columns = time_series.columns.map(lambda x: str(x))
+        # Each step is skipped when the series is already organized, so that
+        # clean series are only checked in O(n) and never copied
+        if not all(isinstance(column, str) for column in time_series.columns):
+            time_series.columns = time_series.columns.map(lambda x: str(x))
         if "date" in list(time_series.columns.str.lower()):
             time_series = time_series.set_index("date")
-        time_series.index = pd.to_datetime(time_series.index)
-        index_counts = (
-            time_series.index.value_counts()
-            .sort_values(ascending=False)
-            .loc[lambda df: df.values > 1]
-        )
-        if len(index_counts) > 0:
-            not_unique_indexes = index_counts.index.to_list()
+        if not isinstance(time_series.index, pd.DatetimeIndex):
+            time_series.index = pd.to_datetime(time_series.index)
+        if not time_series.index.is_unique:
+            index_counts = (
+                time_series.index.value_counts()
+                .sort_values(ascending=False)
+                .loc[lambda df: df.values > 1]
+            )
+            not_unique_indexes = [str(i) for i in index_counts.index]
             if len(not_unique_indexes) > 10:
                 not_unique_indexes = not_unique_indexes[:9] + ["..."]
             not_unique_indexes = ", ".join(not_unique_indexes)
             raise ValueError(
                 f"Time series index contains non-unique values: {not_unique_indexes}"
             )
-        time_series = time_series.sort_index()
-        if filter_end_date is not None:
-            time_series = time_series.loc[:filter_end_date]
+        if not time_series.index.is_monotonic_increasing:
+            time_series = time_series.sort_index()
+        start, end = 0, len(time_series.index)
         if filter_start_date is not None:
-            time_series = time_series.loc[filter_start_date:]
+            start = time_series.index.searchsorted(
+                pd.Timestamp(filter_start_date), side="left"
+            )
+        if filter_end_date is not None:
+            end = time_series.index.searchsorted(
+                pd.Timestamp(filter_end_date), side="right"
+            )
+        if (start, end) != (0, len(time_series.index)):
+            time_series = time_series.iloc[start:end]
         return time_series
@@ -0,0 +1,87 @@
+from collections.abc import Mapping
+import numpy as np
+
+
+DIVISION_OFFSETS_DTYPE = np.dtype(
+    [
+        ("training_start", np.int64),
+        ("forecasting_start", np.int64),
+        ("forecasting_end", np.int64),
+    ]
+)
+
+
+class Division:
+    """
+    Training/forecasting split of a Dataset stored as integer offsets.
+
+    Offsets are half-open positions into the single underlying `dataset.y` and
+    `dataset.X`. The training and forecasting Datasets are only materialized
+    (as views, not copies) when they are requested.
+    """
+
+    __slots__ = (
+        "dataset",
+        "training_start",
+        "forecasting_start",
+        "forecasting_end",
+    )
+
+    def __init__(self, dataset, training_start, forecasting_start, forecasting_end):
+        self.dataset = dataset
+        self.training_start = training_start
+        self.forecasting_start = forecasting_start
+        self.forecasting_end = forecasting_end
+
+    @property
+    def training(self):
+        return self.dataset.view(self.training_start, self.forecasting_start)
+
+    @property
+    def forecasting(self):
+        return self.dataset.view(self.forecasting_start, self.forecasting_end)
+
+    def __getitem__(self, key):
+        if key == "training":
+            return self.training
+        if key == "forecasting":
+            return self.forecasting
+        raise KeyError(key)
+
+    def __len__(self):
+        return self.forecasting_end - self.forecasting_start
+
+    def __repr__(self):
+        return (
+            f"Division(training=[{self.training_start}, {self.forecasting_start}), "
+            f"forecasting=[{self.forecasting_start}, {self.forecasting_end}))"
+        )
+
+
+class Divisions(Mapping):
+    """
+    Read-only mapping from division index (oldest-first) to Division, backed by
+    a structured array of offsets with DIVISION_OFFSETS_DTYPE. Division records
+    are created on access, so many origins cost only the offsets array.
+    """
+
+    def __init__(self, dataset, offsets):
+        self.dataset = dataset
+        self.offsets = offsets
+
+    def __getitem__(self, idx):
+        if not isinstance(idx, (int, np.integer)) or not 0 <= idx < len(self):
+            raise KeyError(idx)
+        training_start, forecasting_start, forecasting_end = self.offsets[idx].item()
+        return Division(
+            self.dataset, training_start, forecasting_start, forecasting_end
+        )
+
+    def __iter__(self):
+        return iter(range(len(self.offsets)))
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __repr__(self):
+        return f"Divisions(n_divisions={len(self)})"
@@ -1,11 +1,16 @@
 import numpy as np
 import pandas as pd
-import csv
-import os
+from scipy import stats
+from models.results_store import (
+    ResultsStore,
+    ERROR_METRICS_TABLE,
+    PATH_RESULTS_DATABASE,
+    TEST_PATH_RESULTS_DATABASE,
+)
 
 
-PATH_ERROR_METRICS_RESULTS = "models/results/error_metrics/error_metrics.csv"
-TEST_PATH_ERROR_METRICS_RESULTS = "models/results/tests/error_metrics/error_metrics.csv"
+PATH_ERROR_METRICS_RESULTS = PATH_RESULTS_DATABASE
+TEST_PATH_ERROR_METRICS_RESULTS = TEST_PATH_RESULTS_DATABASE
 EXTRA_COLUMNS = ["model", "y", "id", "parquet_path"]
 
 
@@ -23,6 +28,18 @@ METRICS = {
     ),
 }
 
+# Metrics that are means over rows, and so can be estimated from a sample of
+# divisions
+ROW_LOSSES = {
+    "MSE": lambda y_true, y_pred: (y_true - y_pred) ** 2,
+    "MAE": lambda y_true, y_pred: np.abs(y_true - y_pred),
+    "SMAPE": (
+        lambda y_true, y_pred: 2
+        * np.abs(y_true - y_pred)
+        / (np.abs(y_true) + np.abs(y_pred))
+    ),
+}
+
 
 class ErrorMetrics:
     def __init__(self, y_name=None, model_name=None, id=None, parquet_path=None):
@@ -31,6 +48,7 @@ class ErrorMetrics:
         self.y_name = y_name
         self.model_name = model_name
         self.parquet_path = parquet_path
+        self.confidence_intervals = {}
 
     def set_parquet_path(self, parquet_path):
         self.parquet_path = parquet_path
@@ -43,13 +61,75 @@ class ErrorMetrics:
             for name, metric in METRICS.items()
         }
 
-    def get_results_file(self, test_path=False):
-        file = (
-            TEST_PATH_ERROR_METRICS_RESULTS if test_path else PATH_ERROR_METRICS_RESULTS
-        )
-        if not os.path.exists(file):
-            raise FileNotFoundError(f"File '{file}' not found.")
-        return pd.read_csv(file)
+    def calculate_confidence_intervals(
+        self, y_true, y_pred, n_rows, n_population, confidence=0.95
+    ):
+        """
+        Confidence intervals of the metrics of a backtest run on a sample of
+        divisions, treating each division as one draw without replacement.
+
+        :param n_rows: Number of rows of each division, in order in 'y_true'.
+        :param n_population: Total number of divisions the sample was drawn from.
+        """
+        organized_y_true = np.squeeze(y_true.iloc[:, 0].values)
+        organized_y_pred = np.squeeze(y_pred.iloc[:, 0].values)
+        n_samples = len(organized_y_true) // n_rows
+        critical_value = stats.t.ppf((1 + confidence) / 2, n_samples - 1)
+        finite_population_correction = np.sqrt(1 - n_samples / n_population)
+        self.confidence_intervals = {}
+        for name, row_loss in ROW_LOSSES.items():
+            division_losses = row_loss(organized_y_true, organized_y_pred)
+            division_losses = division_losses.reshape(n_samples, n_rows).mean(axis=1)
+            half_width = (
+                critical_value
+                * np.std(division_losses, ddof=1)
+                / np.sqrt(n_samples)
+                * finite_population_correction
+            )
+            mean = np.mean(division_losses)
+            self.confidence_intervals[name] = (mean - half_width, mean + half_width)
+        lower, upper = self.confidence_intervals["MSE"]
+        self.confidence_intervals["RMSE"] = (np.sqrt(max(lower, 0)), np.sqrt(upper))
+
+    def get_confidence_intervals(self):
+        return self.confidence_intervals
+
+    @classmethod
+    def get_results_file(cls, test_path=False):
+        return ResultsStore.get(test_path).read(ERROR_METRICS_TABLE)
+
+    @staticmethod
+    def calculate_panel_error_metrics(groups, y_true, y_pred):
+        """
+        Vectorized equivalent of METRICS for many series at once.
+
+        :param groups: Integer group code per row, rows of a group being contiguous
+            and ordered in time.
+        :return: DataFrame with one row per group and one column per metric.
+        """
+        counts = np.bincount(groups)
+
+        def group_mean(values):
+            return np.bincount(groups, weights=values, minlength=len(counts)) / counts
+
+        error = y_true - y_pred
+        group_ends = np.cumsum(counts)
+        group_starts = group_ends - counts
+        # np.roll within each group: the first row is compared to the last one
+        y_true_lag = np.roll(y_true, 1)
+        y_true_lag[group_starts] = y_true[group_ends - 1]
+        mse = group_mean(error**2)
+        mae = group_mean(np.abs(error))
+        return pd.DataFrame(
+            {
+                "MSE": mse,
+                "RMSE": np.sqrt(mse),
+                "MAE": mae,
+                "MASE": mae / group_mean(np.abs(y_true - y_true_lag)),
+                "SMAPE": 2
+                * group_mean(np.abs(error) / (np.abs(y_true) + np.abs(y_pred))),
+            }
+        )[list(METRICS.keys())]
 
     def get(self):
         return self.error_metrics
@@ -64,7 +144,13 @@ class ErrorMetrics:
         error_metrics_plus_info["id"] = self.id
         error_metrics_plus_info["parquet_path"] = self.parquet_path
         error_metrics_frame = pd.DataFrame(error_metrics_plus_info, index=[0])
-        return error_metrics_frame[EXTRA_COLUMNS + list(METRICS.keys())]
+        error_metrics_frame = error_metrics_frame[EXTRA_COLUMNS + list(METRICS.keys())]
+        for name in METRICS:
+            if name in self.confidence_intervals:
+                lower, upper = self.confidence_intervals[name]
+                error_metrics_frame[f"{name}_lower"] = lower
+                error_metrics_frame[f"{name}_upper"] = upper
+        return error_metrics_frame
 
     @classmethod
     def multiple_to_pandas(cls, list_error_metrics, reset_index: bool = True):
@@ -77,22 +163,11 @@ class ErrorMetrics:
             mult_error_metrics.reset_index(drop=True, inplace=True)
         return mult_error_metrics
 
-    def save(self, test_path=False):
-        self._create_results_file()
-        self.to_pandas().to_csv(
-            path_or_buf=(
-                PATH_ERROR_METRICS_RESULTS
-                if not test_path
-                else TEST_PATH_ERROR_METRICS_RESULTS
-            ),
-            mode="a",
-            header=False,
-            index=False,
-        )
+    def get_results_rows(self):
+        return ERROR_METRICS_TABLE, [self.id], self.to_pandas()
 
-    @staticmethod
-    def _create_results_file():
-        if not os.path.exists(PATH_ERROR_METRICS_RESULTS):
-            pd.DataFrame(columns=EXTRA_COLUMNS + list(METRICS.keys())).to_csv(
-                PATH_ERROR_METRICS_RESULTS, index=False
-            )
+    def save(self, test_path=False, writer=None):
+        if writer is not None:
+            writer.put([self.get_results_rows()])
+        else:
+            ResultsStore.get(test_path).insert([self.get_results_rows()])
@@ -0,0 +1,179 @@
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from models.dataset import Dataset
+
+
+class PanelDataset:
+    """
+    Long-format panel of many series stored as contiguous arrays.
+
+    The rows of all entities are sorted by entity and then date in a single
+    'values' and 'dates' array, and the rows of the i-th entity are
+    `entity_offsets[i]:entity_offsets[i + 1]`, so any entity is a zero-copy
+    slice found in O(1), without boolean masks over the whole panel.
+    """
+
+    def __init__(
+        self,
+        entities,
+        dates,
+        values,
+        entity_offsets,
+        time_frequency=None,
+        parquet_path=None,
+    ):
+        self.entities = entities
+        self.dates = dates
+        self.values = values
+        self.entity_offsets = entity_offsets
+        self.time_frequency = time_frequency
+        self.parquet_path = parquet_path
+        self.entity_indexes = None
+
+    @classmethod
+    def from_frame(
+        cls,
+        panel: pd.DataFrame,
+        entity_column="entity",
+        date_column="date",
+        value_column="value",
+        time_frequency=None,
+        parquet_path=None,
+    ):
+        if not (
+            panel[entity_column].is_monotonic_increasing
+            and panel.groupby(entity_column, sort=False)[
+                date_column
+            ].is_monotonic_increasing.all()
+        ):
+            panel = panel.sort_values([entity_column, date_column], kind="stable")
+        entities = panel[entity_column].to_numpy()
+        dates = pd.to_datetime(panel[date_column]).to_numpy(dtype="datetime64[ns]")
+        is_new_entity = np.concatenate([[True], entities[1:] != entities[:-1]])
+        if np.any((dates[1:] == dates[:-1]) & ~is_new_entity[1:]):
+            raise ValueError("Panel contains repeated dates within an entity.")
+        entity_starts = np.flatnonzero(is_new_entity) if len(entities) else []
+        return cls(
+            entities=entities[entity_starts],
+            dates=dates,
+            values=panel[value_column].to_numpy(dtype=float),
+            entity_offsets=np.append(entity_starts, len(entities)).astype(np.int64),
+            time_frequency=time_frequency,
+            parquet_path=parquet_path,
+        )
+
+    @classmethod
+    def from_parquet(
+        cls,
+        path,
+        entity_column="entity",
+        date_column="date",
+        value_column="value",
+        time_frequency=None,
+        entities=None,
+        filter_start_date=None,
+        filter_end_date=None,
+    ):
+        """
+        Loads a long-format (entity, date, value) parquet file, such as the
+        ftsfa datasets, reading only those three columns.
+
+        :param entities: Entities to load, None for all of them.
+        :param filter_start_date: First date to load, None for no limit.
+        :param filter_end_date: Last date to load, None for no limit.
+
+        The entity and date filters are pushed down to the Parquet reader, which
+        skips the row groups whose statistics are out of range.
+        """
+        filters = []
+        if entities is not None:
+            filters.append((entity_column, "in", list(entities)))
+        filter_start_date = Dataset._validate_datetime(
+            filter_start_date, "filter_start_date"
+        )
+        filter_end_date = Dataset._validate_datetime(filter_end_date, "filter_end_date")
+        date_filters = Dataset.get_date_filters(
+            pq.read_schema(path), date_column, filter_start_date, filter_end_date
+        )
+        if date_filters is not None:
+            filters.extend(date_filters)
+        panel = pd.read_parquet(
+            path,
+            columns=[entity_column, date_column, value_column],
+            filters=filters or None,
+        )
+        if date_filters is None and (
+            filter_start_date is not None or filter_end_date is not None
+        ):
+            # Dates not stored as Parquet timestamps are filtered after reading
+            dates = pd.to_datetime(panel[date_column])
+            in_range = pd.Series(True, index=panel.index)
+            if filter_start_date is not None:
+                in_range &= dates >= pd.Timestamp(filter_start_date)
+            if filter_end_date is not None:
+                in_range &= dates <= pd.Timestamp(filter_end_date)
+            panel = panel[in_range]
+        return cls.from_frame(
+            panel,
+            entity_column,
+            date_column,
+            value_column,
+            time_frequency=time_frequency,
+            parquet_path=str(path),
+        )
+
+    def __len__(self):
+        return len(self.entities)
+
+    def __repr__(self):
+        return f"PanelDataset(n_entities={len(self)}, n_rows={len(self.values)})"
+
+    def get_entity_starts(self):
+        return self.entity_offsets[:-1]
+
+    def get_entity_ends(self):
+        return self.entity_offsets[1:]
+
+    def get_entity_index(self, entity):
+        if self.entity_indexes is None:
+            self.entity_indexes = {e: i for i, e in enumerate(self.entities.tolist())}
+        if entity not in self.entity_indexes:
+            raise KeyError(entity)
+        return self.entity_indexes[entity]
+
+    def get_values(self, idx):
+        return self.values[self.entity_offsets[idx] : self.entity_offsets[idx + 1]]
+
+    def get_dates(self, idx):
+        return self.dates[self.entity_offsets[idx] : self.entity_offsets[idx + 1]]
+
+    def get_y(self, entity):
+        idx = self.get_entity_index(entity)
+        return pd.DataFrame(
+            self.get_values(idx)[:, None],
+            index=pd.DatetimeIndex(self.get_dates(idx), name="date"),
+            columns=[str(entity)],
+            copy=False,
+        )
+
+    def get_dataset(self, entity):
+        dataset = Dataset.from_organized_time_series(self.get_y(entity), None)
+        dataset.time_frequency = dataset._validate_time_frequency(self.time_frequency)
+        dataset.parquet_path = self.parquet_path
+        return dataset
+
+    def iter_datasets(self):
+        for entity in self.entities:
+            yield entity, self.get_dataset(entity)
+
+    def to_frame(
+        self, entity_column="entity", date_column="date", value_column="value"
+    ):
+        return pd.DataFrame(
+            {
+                entity_column: np.repeat(self.entities, np.diff(self.entity_offsets)),
+                date_column: self.dates,
+                value_column: self.values,
+            }
+        )
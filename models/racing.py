@@ -0,0 +1,113 @@
+import numpy as np
+from scipy import stats
+
+
+RACE_ORDERS = ("random", "oldest", "newest")
+
+
+class Race:
+    """
+    Early-abort rule for a backtest raced against a baseline model.
+
+    Divisions are evaluated in 'order' and, for each one, the squared error of
+    the model is paired with the squared error of the baseline on the same
+    division. Once at least 'min_divisions' have been evaluated, the backtest
+    stops as soon as a one-sided lower bound of the mean paired difference is
+    above zero, i.e. the model is significantly worse.
+
+    The bound is checked again after every division, so the error rate
+    1 - 'confidence' is spent over the looks: the k-th look uses
+    (1 - confidence) / (k * (k + 1)), which sums to 1 - confidence over any
+    number of looks. The chance of wrongly stopping a model that is not worse
+    than the baseline then stays below 1 - 'confidence' for the whole run.
+
+    Baseline losses are cached per baseline fingerprint, so racing many models
+    on the same series and divisions runs the baseline only once.
+    """
+
+    baseline_losses = {}
+
+    def __init__(
+        self,
+        baseline=None,
+        order: str = "random",
+        confidence: float = 0.99,
+        min_divisions: int = 10,
+        seed: int = 0,
+    ):
+        if baseline is None:
+            from models.univariate_local import NaiveForecasting
+
+            baseline = NaiveForecasting
+        if order not in RACE_ORDERS:
+            raise ValueError(f"'order' must be one of {RACE_ORDERS}.")
+        if not 0 < confidence < 1:
+            raise ValueError("'confidence' must be between 0 and 1.")
+        if min_divisions < 2:
+            raise ValueError("'min_divisions' must be at least 2.")
+        self.baseline = baseline
+        self.order = order
+        self.confidence = confidence
+        self.min_divisions = min_divisions
+        self.seed = seed
+
+    @classmethod
+    def reset_baseline_losses(cls):
+        cls.baseline_losses = {}
+
+    def get_order(self, n_divisions):
+        if self.order == "oldest":
+            return np.arange(n_divisions)
+        if self.order == "newest":
+            return np.arange(n_divisions)[::-1]
+        return np.random.default_rng(self.seed).permutation(n_divisions)
+
+    @staticmethod
+    def get_losses(y_true, y_pred, n_rows):
+        """
+        :return: Mean squared error of each division, for predictions stacked
+            'n_rows' rows per division.
+        """
+        squared_errors = (np.asarray(y_true) - np.asarray(y_pred)) ** 2
+        return squared_errors.reshape(-1, n_rows * squared_errors.shape[-1]).mean(
+            axis=1
+        )
+
+    def get_baseline_losses(self, model):
+        baseline = self.baseline.from_dataset(
+            model.dataset,
+            step_size=model.step_size,
+            forecasting_start_date=model.forecasting_start_date,
+            n_forecasting=model.n_forecasting,
+            intersect_forecasting=model.intersect_forecasting,
+            only_consider_last_of_each_intersection=model.only_consider_last_of_each_intersection,
+            rolling=model.rolling,
+            window_length=model.window_length,
+        )
+        fingerprint = baseline.get_fingerprint()
+        if fingerprint not in self.baseline_losses:
+            baseline.run()
+            self.baseline_losses[fingerprint] = self.get_losses(
+                baseline.y_true, baseline.y_pred, baseline._get_n_rows_per_division()
+            )
+        return self.baseline_losses[fingerprint]
+
+    def get_look_alpha(self, look):
+        # Error rate spent at the 'look'-th check, starting at 1
+        return (1 - self.confidence) / (look * (look + 1))
+
+    def is_lost(self, differences):
+        """
+        :param differences: Model loss minus baseline loss of each division
+            evaluated so far.
+        """
+        n = len(differences)
+        if n < self.min_divisions:
+            return False
+        mean = np.mean(differences)
+        std = np.std(differences, ddof=1)
+        if std == 0:
+            return mean > 0
+        alpha = self.get_look_alpha(n - self.min_divisions + 1)
+        lower_bound = mean - stats.t.ppf(1 - alpha, n - 1) * std / np.sqrt(n)
+        return lower_bound > 0
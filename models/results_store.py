@@ -0,0 +1,204 @@
+import datetime
+import os
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+
+
+PATH_RESULTS_DATABASE = "models/results/results.sqlite"
+TEST_PATH_RESULTS_DATABASE = "models/results/tests/results.sqlite"
+
+TIME_SERIES_MODELS_TABLE = "time_series_models"
+ERROR_METRICS_TABLE = "error_metrics"
+CHECKPOINTS_TABLE = "division_checkpoints"
+TELEMETRY_TABLE = "division_telemetry"
+KEY_COLUMN = "result_key"
+
+
+def to_sql_value(value):
+    if value is None or (np.isscalar(value) and pd.isna(value)):
+        return None
+    if isinstance(value, (pd.Timestamp, datetime.date)):
+        return pd.Timestamp(value).isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class ResultsStore:
+    """
+    SQLite results backend with a unique key per table.
+
+    The keys of a table are read once per process into an in-memory set, so
+    checking whether a result exists does not touch the disk, and rows written
+    through `insert` are committed in a single transaction. The key sets are
+    guarded by a lock, as a ResultsWriter thread may insert while the caller's
+    thread checks for results.
+    """
+
+    stores = {}
+
+    @classmethod
+    def get(cls, test_path=False):
+        path = TEST_PATH_RESULTS_DATABASE if test_path else PATH_RESULTS_DATABASE
+        if path not in cls.stores:
+            cls.stores[path] = cls(path)
+        return cls.stores[path]
+
+    @classmethod
+    def reset_stores(cls):
+        cls.stores = {}
+
+    def __init__(self, path):
+        self.path = path
+        self.keys = {}
+        self.lock = threading.Lock()
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def connect(self):
+        """
+        Connection that can be passed to `insert` and `delete` to reuse it over
+        many calls from the same thread. It is closed by the caller.
+        """
+        return self._connect()
+
+    def _connect(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        return sqlite3.connect(self.path)
+
+    @staticmethod
+    def _get_columns(connection, table):
+        return [row[1] for row in connection.execute(f'PRAGMA table_info("{table}")')]
+
+    def _ensure_table(self, connection, table, columns):
+        connection.execute(
+            f'CREATE TABLE IF NOT EXISTS "{table}" ("{KEY_COLUMN}" TEXT PRIMARY KEY)'
+        )
+        existing_columns = self._get_columns(connection, table)
+        for column in columns:
+            if column not in existing_columns:
+                connection.execute(f'ALTER TABLE "{table}" ADD COLUMN "{column}"')
+
+    def insert(self, rows, connection=None):
+        """
+        Insert rows into one or more tables in a single transaction.
+
+        :param rows: Iterable of (table, keys, frame) where 'keys' holds one
+            unique key per row of 'frame'. Rows with an existing key are replaced.
+        :param connection: Optional connection from `connect` to reuse, left
+            open. A new connection is opened and closed otherwise.
+        """
+        rows = list(rows)
+        is_new_connection = connection is None
+        if is_new_connection:
+            connection = self._connect()
+        try:
+            with connection:
+                for table, keys, frame in rows:
+                    columns = list(frame.columns)
+                    self._ensure_table(connection, table, columns)
+                    placeholders = ", ".join(["?"] * (len(columns) + 1))
+                    names = ", ".join(f'"{c}"' for c in [KEY_COLUMN] + columns)
+                    connection.executemany(
+                        f'INSERT OR REPLACE INTO "{table}" ({names}) VALUES ({placeholders})',
+                        [
+                            [key] + [to_sql_value(v) for v in values]
+                            for key, values in zip(keys, frame.itertuples(index=False))
+                        ],
+                    )
+        finally:
+            if is_new_connection:
+                connection.close()
+        with self.lock:
+            for table, keys, _ in rows:
+                if table in self.keys:
+                    self.keys[table].update(keys)
+
+    def _get_keys(self, table):
+        # Must be called holding 'lock'
+        if not self.exists():
+            self.keys = {}
+            return set()
+        if table not in self.keys:
+            connection = self._connect()
+            try:
+                if table in self._get_tables(connection):
+                    query = f'SELECT "{KEY_COLUMN}" FROM "{table}"'
+                    self.keys[table] = {row[0] for row in connection.execute(query)}
+                else:
+                    self.keys[table] = set()
+            finally:
+                connection.close()
+        return self.keys[table]
+
+    def get_keys(self, table):
+        with self.lock:
+            return set(self._get_keys(table))
+
+    def delete(self, table, filters, connection=None):
+        """
+        Deletes the rows of 'table' equal to every value of 'filters', a dict
+        of column to value. Does nothing if the database or table is missing.
+        """
+        if not self.exists():
+            return
+        is_new_connection = connection is None
+        if is_new_connection:
+            connection = self._connect()
+        try:
+            if table not in self._get_tables(connection):
+                return
+            with connection:
+                connection.execute(
+                    f'DELETE FROM "{table}" WHERE '
+                    + " AND ".join(f'"{c}" = ?' for c in filters),
+                    [to_sql_value(v) for v in filters.values()],
+                )
+        finally:
+            if is_new_connection:
+                connection.close()
+        with self.lock:
+            # Reloaded from the database on the next check
+            self.keys.pop(table, None)
+
+    def contains(self, table, key):
+        with self.lock:
+            return key in self._get_keys(table)
+
+    @staticmethod
+    def _get_tables(connection):
+        query = "SELECT name FROM sqlite_master WHERE type='table'"
+        return [row[0] for row in connection.execute(query)]
+
+    def read(self, table, parse_dates=None, filters=None):
+        """
+        :param filters: Optional dict of column to value, only rows equal to
+            every value being read.
+        """
+        if not self.exists():
+            raise FileNotFoundError(f"File '{self.path}' not found.")
+        filters = filters or {}
+        query = f'SELECT * FROM "{table}"'
+        if filters:
+            query += " WHERE " + " AND ".join(f'"{c}" = ?' for c in filters)
+        connection = self._connect()
+        try:
+            if table not in self._get_tables(connection):
+                raise ValueError(f"Table '{table}' not found in '{self.path}'.")
+            frame = pd.read_sql(
+                query,
+                connection,
+                params=[to_sql_value(v) for v in filters.values()],
+            )
+        finally:
+            connection.close()
+        frame = frame.drop(columns=[KEY_COLUMN])
+        for column in parse_dates or []:
+            if column in frame.columns:
+                frame[column] = pd.to_datetime(frame[column])
+        return frame
@@ -0,0 +1,116 @@
+import atexit
+import queue
+import threading
+import time
+import pandas as pd
+from models.results_store import ResultsStore
+
+
+_STOP = object()
+_FLUSH = object()
+
+
+class ResultsWriter:
+    """
+    Writes result rows to a ResultsStore from a background thread.
+
+    Rows are put on a bounded queue (so producers only block when the writer
+    falls `max_queue_size` items behind) and are inserted in one transaction
+    per batch, every `flush_interval` seconds or once `batch_size` rows are
+    pending. Pending rows are flushed on `close`, which also runs at exit.
+    """
+
+    def __init__(
+        self, test_path=False, max_queue_size=1000, flush_interval=5.0, batch_size=100
+    ):
+        self.store = ResultsStore.get(test_path)
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.error = None
+        self.is_closed = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def put(self, rows):
+        """
+        :param rows: Iterable of (table, keys, frame), as taken by ResultsStore.insert.
+        """
+        if self.is_closed:
+            raise ValueError("Cannot put rows in a closed ResultsWriter.")
+        self._raise_error()
+        self.queue.put(list(rows))
+
+    def flush(self):
+        # Blocks until every row put so far has been written
+        if self.is_closed:
+            raise ValueError("Cannot flush a closed ResultsWriter.")
+        self.queue.put(_FLUSH)
+        self.queue.join()
+        self._raise_error()
+
+    def close(self):
+        if self.is_closed:
+            return
+        self.is_closed = True
+        self.queue.put(_STOP)
+        self.thread.join()
+        atexit.unregister(self.close)
+        self._raise_error()
+
+    def _raise_error(self):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def _run(self):
+        pending = []
+        n_pending_items = 0
+        last_flush = time.monotonic()
+        while True:
+            timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is not None:
+                n_pending_items += 1
+                if item is not _STOP and item is not _FLUSH:
+                    pending.extend(item)
+            n_pending_rows = sum(len(keys) for _, keys, _ in pending)
+            if (
+                item is _STOP
+                or item is _FLUSH
+                or n_pending_rows >= self.batch_size
+                or time.monotonic() - last_flush >= self.flush_interval
+            ):
+                self._write(pending)
+                for _ in range(n_pending_items):
+                    self.queue.task_done()
+                pending, n_pending_items = [], 0
+                last_flush = time.monotonic()
+            if item is _STOP:
+                return
+
+    def _write(self, pending):
+        if not pending:
+            return
+        tables = {}
+        for table, keys, frame in pending:
+            tables.setdefault(table, ([], []))
+            tables[table][0].extend(keys)
+            tables[table][1].append(frame)
+        try:
+            self.store.insert(
+                (table, keys, pd.concat(frames, axis=0, ignore_index=True))
+                for table, (keys, frames) in tables.items()
+            )
+        except Exception as e:
+            self.error = e
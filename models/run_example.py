@@ -10,6 +10,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 import pandas as pd
 from models.dataset import Dataset
 from models.time_series_model import TimeSeriesModel
+from models.results_writer import ResultsWriter
 import models.univariate_local as mul
 
 
@@ -75,34 +76,34 @@ if __name__ == "__main__":
         ignore_models=["Lstm", "Sarima", "HoltWinters"]
     )
     parquets = get_parquets()
-    for parquet in parquets:
-        datasets = Dataset.from_parquet_all_from_table(parquet)
-        for dataset in datasets:
-            for model in forecasting_models:
-                time_start = datetime.datetime.now()
-                model_instance = model.from_dataset(
-                    dataset=dataset,
-                    step_size=STEP_SIZE,
-                    n_forecasting=N_FORECASTING,
-                )
-                model_instance.build_divisions()
-                if model_instance.is_it_already_in_results():
-                    logging.info(
-                        f"Skipped due to already being in results {model.__name__}(parquet={parquet}, y={dataset.get_y_name()})"
+    with ResultsWriter() as writer:
+        for parquet in parquets:
+            datasets = Dataset.from_parquet_all_from_table(parquet)
+            for dataset in datasets:
+                for model in forecasting_models:
+                    time_start = datetime.datetime.now()
+                    model_instance = model.from_dataset(
+                        dataset=dataset,
+                        step_size=STEP_SIZE,
+                        n_forecasting=N_FORECASTING,
                     )
-                    continue
-                try:
-                    signal.alarm(TIMEOUT_SECONDS)  # Start timeout
-                    model_instance.run()
-                    signal.alarm(0)
-                except TimeoutException:
+                    if model_instance.is_it_already_in_results():
+                        logging.info(
+                            f"Skipped due to already being in results {model.__name__}(parquet={parquet}, y={dataset.get_y_name()})"
+                        )
+                        continue
+                    try:
+                        signal.alarm(TIMEOUT_SECONDS)  # Start timeout
+                        model_instance.run(checkpoint=True)
+                        signal.alarm(0)
+                    except TimeoutException:
+                        logging.info(
+                            f"Timed out {TIMEOUT_SECONDS} seconds before finishing {model.__name__}(parquet={parquet}, y={dataset.get_y_name()}), completed divisions are checkpointed"
+                        )
+                        continue
+                    model_instance.assess_error()
+                    model_instance.save(writer=writer)
+                    time_delta = (datetime.datetime.now() - time_start).total_seconds()
                     logging.info(
-                        f"Timed out {TIMEOUT_SECONDS} seconds before finishing {model.__name__}(parquet={parquet}, y={dataset.get_y_name()})"
+                        f"Processed {model.__name__}(parquet={parquet}, y={dataset.get_y_name()}) in {time_delta}s"
                     )
-                    continue
-                model_instance.assess_error()
-                model_instance.save()
-                time_delta = (datetime.datetime.now() - time_start).total_seconds()
-                logging.info(
-                    f"Processed {model.__name__}(parquet={parquet}, y={dataset.get_y_name()}) in {time_delta}s"
-                )
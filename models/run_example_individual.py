@@ -31,7 +31,6 @@ if __name__ == "__main__":
             step_size=1,
             n_forecasting=12,
         )
-        model_instance.build_divisions()
         model_instance.run()
         model_instance.assess_error()
         model_instance.save()
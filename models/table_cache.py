@@ -0,0 +1,122 @@
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+import numpy as np
+
+
+DEFAULT_MAX_BYTES = 2 * 1024**3
+
+
+def get_table_size(table, index=True):
+    # Estimated in-memory size of a table, in bytes
+    return int(np.sum(table.memory_usage(index=index, deep=True)))
+
+
+class TableCache(MutableMapping):
+    """
+    Dict-like cache of tables bounded by an estimated memory budget.
+
+    Tables are evicted least recently used first once the total size goes over
+    'max_bytes', except for pinned tables, which stay until they are unpinned.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.tables = OrderedDict()
+        self.sizes = {}
+        self.pins = {}
+        self.n_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __getitem__(self, key):
+        if key not in self.tables:
+            self.misses += 1
+            raise KeyError(key)
+        self.hits += 1
+        self.tables.move_to_end(key)
+        return self.tables[key]
+
+    def __setitem__(self, key, table):
+        self.set(key, table)
+
+    def set(self, key, table, n_bytes=None):
+        """
+        :param n_bytes: Size of 'table' to account for, estimated with
+            get_table_size if None. Tables sharing an index can pass their share
+            of it, so that the index is counted once.
+        """
+        if key in self.tables:
+            self._remove(key)
+        self.tables[key] = table
+        self.sizes[key] = get_table_size(table) if n_bytes is None else int(n_bytes)
+        self.n_bytes += self.sizes[key]
+        self._evict()
+
+    def __delitem__(self, key):
+        if key not in self.tables:
+            raise KeyError(key)
+        self._remove(key)
+        self.pins.pop(key, None)
+
+    def __contains__(self, key):
+        return key in self.tables
+
+    def __iter__(self):
+        return iter(self.tables)
+
+    def __len__(self):
+        return len(self.tables)
+
+    def __repr__(self):
+        return (
+            f"TableCache(n_tables={len(self)}, n_bytes={self.n_bytes}, "
+            f"max_bytes={self.max_bytes})"
+        )
+
+    def _remove(self, key):
+        del self.tables[key]
+        self.n_bytes -= self.sizes.pop(key)
+
+    def _evict(self):
+        for key in list(self.tables):
+            if self.n_bytes <= self.max_bytes:
+                return
+            if self.pins.get(key, 0) == 0:
+                self._remove(key)
+                self.evictions += 1
+
+    def set_max_bytes(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def pin(self, key):
+        self.pins[key] = self.pins.get(key, 0) + 1
+
+    def unpin(self, key):
+        if self.pins.get(key, 0) == 0:
+            raise ValueError(f"Table '{key}' is not pinned.")
+        self.pins[key] -= 1
+        if self.pins[key] == 0:
+            del self.pins[key]
+            self._evict()
+
+    @contextmanager
+    def pinned(self, key):
+        self.pin(key)
+        try:
+            yield
+        finally:
+            self.unpin(key)
+
+    def get_stats(self):
+        return {
+            "n_tables": len(self),
+            "n_bytes": self.n_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "pinned": sorted(self.pins),
+        }
@@ -1,20 +1,46 @@
 from abc import abstractmethod
 import random
+import time
+import tracemalloc
+import warnings
 from typing import Union, List
 import datetime
+import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from joblib import Parallel, delayed, parallel_config
 from models.dataset import Dataset
+from models.panel_dataset import PanelDataset
+from models.division import Division, Divisions, DIVISION_OFFSETS_DTYPE
 from models.error_metrics import ErrorMetrics
-import os
+from models.results_store import (
+    ResultsStore,
+    TIME_SERIES_MODELS_TABLE,
+    CHECKPOINTS_TABLE,
+    TELEMETRY_TABLE,
+    PATH_RESULTS_DATABASE,
+    TEST_PATH_RESULTS_DATABASE,
+    to_sql_value,
+)
+import hashlib
+import itertools
+import json
 
 
 MODELS_PATH = "models"
-PATH_TIME_SERIES_MODELS_RESULTS = (
-    "models/results/time_series_models/time_series_models.csv"
-)
-TEST_PATH_TIME_SERIES_MODELS_RESULTS = (
-    "models/results/tests/time_series_models/time_series_models.csv"
-)
+PATH_TIME_SERIES_MODELS_RESULTS = PATH_RESULTS_DATABASE
+TEST_PATH_TIME_SERIES_MODELS_RESULTS = TEST_PATH_RESULTS_DATABASE
+
+TELEMETRY_COLUMNS = [
+    "division",
+    "forecasting_start_date",
+    "fit_time",
+    "forecast_time",
+    "n_candidates",
+    "n_failed_candidates",
+    "n_convergence_warnings",
+    "peak_memory_mb",
+]
 
 DATE_COLUMNS = [
     "forecasting_start_date",
@@ -23,6 +49,14 @@ DATE_COLUMNS = [
 ]
 
 
+_warnings_registry = {}
+
+
+def _fit_forecast_in_worker(model, division):
+    model.fit_n_jobs = 1
+    return model._fit_forecast(division)
+
+
 class TimeSeriesModel:
     name = "Time Series Abstract Model"
     code = "TSA"
@@ -30,6 +64,11 @@ class TimeSeriesModel:
     python_version = "3.12.6"
     requirements_file = "requirements.txt"
     run_code = None
+    fit_n_jobs = -1
+    trace_memory = False
+    # Whether the model reads X in fit, update and forecast
+    uses_X = False
+    hyperparameters = ()
 
     @staticmethod
     def _fitted(fit_func):
@@ -83,12 +122,19 @@ class TimeSeriesModel:
         only_consider_last_of_each_intersection: bool = False,
         rolling: bool = False,
         time_frequency: str = None,
+        window_length: int = None,
     ):
         self.base_model = None
         self.id = self._create_id()
         self.is_error_assessed = False
         self.is_div_built = False
         self.is_fitted = False
+        self.is_censored = False
+        self.n_evaluated_divisions = None
+        self.division_sample = None
+        self.sampling = None
+        self.fit_telemetry = {}
+        self.telemetry = None
         if n_forecasting is not None and forecasting_start_date is not None:
             raise ValueError(
                 "Only one of 'n_forecasting' and 'forecasting_start_date' should be provided."
@@ -108,6 +154,7 @@ class TimeSeriesModel:
             only_consider_last_of_each_intersection
         )
         self.rolling = rolling
+        self.window_length = self._validate_window_length(rolling, window_length)
         self.error_metrics = ErrorMetrics(
             model_name=self.get_model_name(),
             y_name=self.dataset.y.columns[0],
@@ -125,6 +172,7 @@ class TimeSeriesModel:
         intersect_forecasting: bool = False,
         only_consider_last_of_each_intersection: bool = False,
         rolling: bool = False,
+        window_length: int = None,
     ):
         new_model = cls.__new__(cls)
         new_model.base_model = None
@@ -132,6 +180,12 @@ class TimeSeriesModel:
         new_model.is_error_assessed = False
         new_model.is_div_built = False
         new_model.is_fitted = False
+        new_model.is_censored = False
+        new_model.n_evaluated_divisions = None
+        new_model.division_sample = None
+        new_model.sampling = None
+        new_model.fit_telemetry = {}
+        new_model.telemetry = None
         new_model.dataset = dataset
         new_model.step_size = step_size
         new_model.forecasting_start_date = forecasting_start_date
@@ -141,6 +195,7 @@ class TimeSeriesModel:
             only_consider_last_of_each_intersection
         )
         new_model.rolling = rolling
+        new_model.window_length = cls._validate_window_length(rolling, window_length)
         new_model.error_metrics = ErrorMetrics(
             model_name=new_model.get_model_name(),
             y_name=new_model.dataset.y.columns[0],
@@ -150,6 +205,18 @@ class TimeSeriesModel:
         new_model.divisions = {}
         return new_model
 
+    @staticmethod
+    def _validate_window_length(rolling, window_length):
+        if window_length is None:
+            return None
+        if not rolling:
+            raise ValueError(
+                "'window_length' can only be provided if 'rolling' is True."
+            )
+        if int(window_length) != window_length or window_length < 1:
+            raise ValueError("'window_length' must be a positive integer.")
+        return int(window_length)
+
     @property
     def y(self):
         return self.dataset.y
@@ -158,69 +225,163 @@ class TimeSeriesModel:
     def X(self):
         return self.dataset.X
 
-    def build_divisions(self):
-        end_index = len(self.y) - 1
-        start_index = end_index - self.step_size + 1
-        n_forecasting_left = self.n_forecasting if self.n_forecasting is not None else 0
+    def _get_delta_index(self):
+        return 1 if self.intersect_forecasting else self.step_size
+
+    def get_n_divisions(self):
+        last_start_index = len(self.y) - self.step_size
         forecasting_start_date = (
             self.forecasting_start_date
             if self.forecasting_start_date is not None
-            else self.y.index[end_index]
+            else self.y.index[-1]
+        )
+        first_start_index = self.y.index.searchsorted(
+            pd.Timestamp(forecasting_start_date), side="left"
+        )
+        n_divisions_from_date = (
+            (last_start_index - first_start_index) // self._get_delta_index() + 1
+            if last_start_index >= first_start_index
+            else 0
         )
-        delta_index = 1 if self.intersect_forecasting else self.step_size
-        idx = 0
-
-        while (
-            n_forecasting_left > 0
-            or forecasting_start_date <= self.y.index[start_index]
-        ):
-            self.divisions[idx] = self.build_new_division(
-                self.y, self.X, start_index, end_index
+        n_forecasting = self.n_forecasting if self.n_forecasting is not None else 0
+        return max(n_forecasting, n_divisions_from_date)
+
+    def get_division_offsets(self, n_divisions=None):
+        # Offsets of every division, oldest-first, as a DIVISION_OFFSETS_DTYPE array
+        if n_divisions is None:
+            n_divisions = self.get_n_divisions()
+        offsets = np.empty(n_divisions, dtype=DIVISION_OFFSETS_DTYPE)
+        offsets["forecasting_start"] = (
+            self._get_first_start_index(n_divisions)
+            + np.arange(n_divisions) * self._get_delta_index()
+        )
+        offsets["forecasting_end"] = offsets["forecasting_start"] + self.step_size
+        offsets["training_start"] = 0
+        if self.rolling:
+            offsets["training_start"] = np.maximum(
+                0, offsets["forecasting_start"] - self.get_window_length(n_divisions)
             )
-            end_index = end_index - delta_index
-            start_index = end_index - self.step_size + 1
-            n_forecasting_left -= 1
-            idx += 1
-        self._reindex_divisions()
-        self.is_div_built = True
+        return offsets
+
+    def _get_division(self, idx, n_divisions=None):
+        # Divisions are indexed oldest-first, 'idx' 0 being the oldest origin
+        if n_divisions is None:
+            n_divisions = self.get_n_divisions()
+        if idx < 0 or idx >= n_divisions:
+            raise IndexError(f"Division {idx} out of range [0, {n_divisions}).")
+        # Same offsets as row 'idx' of get_division_offsets, computed directly
+        forecasting_start = (
+            self._get_first_start_index(n_divisions) + idx * self._get_delta_index()
+        )
+        training_start = 0
+        if self.rolling:
+            training_start = max(
+                0, forecasting_start - self.get_window_length(n_divisions)
+            )
+        return Division(
+            self.dataset,
+            training_start,
+            forecasting_start,
+            forecasting_start + self.step_size,
+        )
+
+    def _get_first_start_index(self, n_divisions):
+        first_start_index = (
+            len(self.y) - self.step_size - (n_divisions - 1) * self._get_delta_index()
+        )
+        if first_start_index < 1:
+            raise ValueError(
+                f"Not enough observations in 'y' to build {n_divisions} divisions."
+            )
+        return first_start_index
+
+    def get_forecasting_windows(self, n_divisions=None):
+        """
+        Values of 'y' over the forecasting period of every division, oldest-first,
+        as a strided view of shape (n_divisions, step_size, n_columns). Overlapping
+        divisions share the same memory instead of holding one copy each.
+        """
+        if n_divisions is None:
+            n_divisions = self.get_n_divisions()
+        first_start_index = self._get_first_start_index(n_divisions)
+        windows = sliding_window_view(self.y.to_numpy(), self.step_size, axis=0)
+        windows = windows[first_start_index :: self._get_delta_index()]
+        return windows[:n_divisions].transpose(0, 2, 1)
+
+    def get_window_length(self, n_divisions=None):
+        if not self.rolling:
+            return None
+        if self.window_length is not None:
+            return self.window_length
+        # Defaults to the training length of the oldest division, so that every
+        # division trains on the same number of observations
+        if n_divisions is None:
+            n_divisions = self.get_n_divisions()
+        return self._get_first_start_index(n_divisions)
+
+    def iter_divisions(self, order=None):
+        offsets = self.get_division_offsets()
+        if order is not None:
+            offsets = offsets[order]
+        for division_offsets in offsets.tolist():
+            yield Division(self.dataset, *division_offsets)
 
-    def _reindex_divisions(self):
-        max_idx = max(self.divisions.keys())
-        divisions_copy = self.divisions.copy()
-        for idx, division in self.divisions.items():
-            new_idx = idx - max_idx
-            divisions_copy[abs(new_idx)] = division
-        self.divisions = dict(sorted(divisions_copy.items()))
+    @staticmethod
+    def sample_divisions(n_divisions, n_samples, sampling="even", seed=0):
+        """
+        :param sampling: 'even' for evenly spaced divisions or 'stratified' for
+            one random division in each of 'n_samples' equally sized strata.
+        :return: Sorted indices of the sampled divisions.
+        """
+        if n_samples < 2 or n_samples > n_divisions:
+            raise ValueError(
+                f"'n_samples' must be between 2 and the number of divisions ({n_divisions})."
+            )
+        if sampling == "even":
+            return np.linspace(0, n_divisions - 1, n_samples).round().astype(np.int64)
+        if sampling == "stratified":
+            edges = np.linspace(0, n_divisions, n_samples + 1).astype(np.int64)
+            return np.random.default_rng(seed).integers(edges[:-1], edges[1:])
+        raise ValueError("'sampling' must be either 'even' or 'stratified'.")
+
+    def build_divisions(self, n_samples=None, sampling="even", seed=0):
+        """
+        :param n_samples: If provided, only a sample of 'n_samples' divisions is
+            built and later run, for a fast approximate backtest whose error
+            metrics come with sampling confidence intervals.
+        """
+        offsets = self.get_division_offsets()
+        if n_samples is None:
+            self.division_sample = None
+            self.sampling = None
+        else:
+            self.division_sample = self.sample_divisions(
+                len(offsets), n_samples, sampling, seed
+            )
+            self.sampling = {
+                "n_samples": n_samples,
+                "sampling": sampling,
+                "seed": seed if sampling == "stratified" else None,
+            }
+            offsets = offsets[self.division_sample]
+        self.divisions = Divisions(self.dataset, offsets)
+        self.is_div_built = True
 
     def get_training_div(self, idx):
-        if self.divisions is None:
-            raise ValueError("Divisions have not been built yet.")
-        return self.divisions[idx]["training"]
+        return self._get_built_division(idx).training
 
     def get_forecasting_div(self, idx):
-        if self.divisions is None:
-            raise ValueError("Divisions have not been built yet.")
-        return self.divisions[idx]["forecasting"]
+        return self._get_built_division(idx).forecasting
 
-    @staticmethod
-    def build_new_division(y, X, start_index, end_index):
-        y = y.copy()
-        forecasting = {
-            "forecasting": {"y": y.iloc[start_index : end_index + 1], "X": None}
-        }
-        forecasting = {
-            "forecasting": Dataset.create_from_y(y.iloc[start_index : end_index + 1])
-        }
-        if X is not None:
-            X = X.copy()
-            forecasting = forecasting["forecasting"].set_X(
-                X.iloc[start_index : end_index + 1]
-            )
+    def _get_built_division(self, idx):
+        # 'idx' indexes the built divisions, which may be a sample of the origins
+        if self.is_div_built:
+            return self.divisions[idx]
+        return self._get_division(idx)
 
-        training = {"training": Dataset.create_from_y(y.iloc[:start_index])}
-        if X is not None:
-            training["training"].set_X(X.iloc[:start_index])
-        return {**training, **forecasting}
+    @staticmethod
+    def build_new_division(dataset, start_index, end_index, training_start=0):
+        return Division(dataset, training_start, start_index, end_index + 1)
 
     @abstractmethod
     def fit(self, y, X):
@@ -230,49 +391,393 @@ class TimeSeriesModel:
     def forecast(self, y, X):
         pass
 
+    def update(self, y, X=None):
+        # Optional warm start: extend an already fitted model with the 'y' and
+        # 'X' observed since the last fit or update
+        raise NotImplementedError(
+            f"{self.get_model_name()} does not implement 'update'."
+        )
+
+    @classmethod
+    def supports_update(cls):
+        return cls.update is not TimeSeriesModel.update
+
+    @staticmethod
+    def forecast_panel(values, entity_starts, origins):
+        # Optional vectorized backtest: forecasts for every row whose series
+        # starts at 'entity_starts' and whose training data ends before 'origins'
+        raise NotImplementedError
+
+    @classmethod
+    def supports_panel(cls):
+        return cls.forecast_panel is not TimeSeriesModel.forecast_panel
+
+    @classmethod
+    def run_panel(
+        cls,
+        panel: Union[pd.DataFrame, PanelDataset],
+        step_size: int = 1,
+        n_forecasting: int = 12,
+        parquet_path=None,
+        entity_column="entity",
+        date_column="date",
+        value_column="value",
+    ):
+        """
+        Expanding-window backtest of every entity of a long-format panel in one
+        vectorized pass, equivalent to running the model on each entity with
+        'step_size' and 'n_forecasting'. Entities without at least one training
+        observation before the first origin are skipped.
+
+        :param panel: PanelDataset, or long-format DataFrame with the
+            'entity_column', 'date_column' and 'value_column' columns.
+        :return: Error metrics frame with one row per entity.
+        """
+        if not cls.supports_panel():
+            raise NotImplementedError(
+                f"{cls.name} does not support vectorized panel backtests."
+            )
+        if not isinstance(panel, PanelDataset):
+            panel = PanelDataset.from_frame(
+                panel, entity_column, date_column, value_column
+            )
+        if parquet_path is None:
+            parquet_path = panel.parquet_path
+        values = panel.values
+        entities = panel.entities
+        entity_starts = panel.get_entity_starts()
+        entity_ends = panel.get_entity_ends()
+
+        n_rows = step_size * n_forecasting
+        is_valid = entity_ends - entity_starts > n_rows
+        entities = entities[is_valid]
+        entity_starts, entity_ends = entity_starts[is_valid], entity_ends[is_valid]
+        offsets = np.tile(np.arange(n_rows), len(entity_starts))
+        first_positions = np.repeat(entity_ends - n_rows, n_rows)
+        positions = first_positions + offsets
+        origins = first_positions + (offsets // step_size) * step_size
+
+        y_pred = cls.forecast_panel(values, np.repeat(entity_starts, n_rows), origins)
+        groups = np.repeat(np.arange(len(entity_starts)), n_rows)
+        error_metrics = ErrorMetrics.calculate_panel_error_metrics(
+            groups, values[positions], y_pred
+        )
+        error_metrics.insert(0, "parquet_path", parquet_path)
+        # One id per entity, as error metric rows are keyed by id
+        run_id = cls.__new__(cls)._create_id()
+        error_metrics.insert(0, "id", [f"{run_id}-{entity}" for entity in entities])
+        error_metrics.insert(0, "y", entities)
+        error_metrics.insert(0, "model", cls.name)
+        return error_metrics
+
     def _join_predictions(self):
-        all_y_true = pd.DataFrame()
-        all_y_pred = pd.DataFrame()
-        for division in self.divisions.values():
-            new_y_true = division["forecasting"].get_y()
-            if (
-                self.only_consider_last_of_each_intersection
-                and self.intersect_forecasting
-            ):
-                new_y_true = new_y_true.iloc[-1, :]
-            all_y_true = pd.concat([all_y_true, new_y_true], axis=0)
-
-            new_y_pred = division["forecasting"].get_y_pred()
-            if (
-                self.only_consider_last_of_each_intersection
-                and self.intersect_forecasting
-            ):
-                new_y_pred = new_y_pred.iloc[-1, :]
-            all_y_pred = pd.concat([all_y_pred, new_y_pred], axis=0)
-        return all_y_true, all_y_pred
+        return self.y_true, self.y_pred
+
+    def _measure(self, fit, forecast):
+        """
+        Runs 'fit' and then 'forecast', returning the forecast and the telemetry
+        of the division. Models with a search over candidate fits report it in
+        'fit_telemetry' as 'n_candidates', 'n_failed_candidates' and
+        'n_convergence_warnings'.
+
+        With 'trace_memory', the peak memory is the largest memory traced by
+        tracemalloc during the division above what was allocated before it, so
+        it covers the Python and NumPy allocations of this division only.
+        """
+        self.fit_telemetry = {}
+        peak_memory_mb = None
+        is_tracing = tracemalloc.is_tracing()
+        if self.trace_memory:
+            if not is_tracing:
+                tracemalloc.start()
+            start_memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        try:
+            with warnings.catch_warnings(record=True) as caught:
+                # Every warning is recorded, not only the first one per location
+                warnings.simplefilter("always")
+                start = time.perf_counter()
+                fit()
+                fit_time = time.perf_counter() - start
+                start = time.perf_counter()
+                y_pred = forecast()
+                forecast_time = time.perf_counter() - start
+            if self.trace_memory:
+                peak_memory = tracemalloc.get_traced_memory()[1] - start_memory
+                peak_memory_mb = peak_memory / 1024**2
+        finally:
+            if self.trace_memory and not is_tracing:
+                tracemalloc.stop()
+        # Warnings are re-emitted once counted, as if they were never caught
+        for warning in caught:
+            warnings.warn_explicit(
+                warning.message,
+                warning.category,
+                warning.filename,
+                warning.lineno,
+                registry=_warnings_registry,
+            )
+        n_convergence_warnings = sum(
+            "Convergence" in warning.category.__name__ for warning in caught
+        )
+        telemetry = {
+            "fit_time": fit_time,
+            "forecast_time": forecast_time,
+            "n_candidates": self.fit_telemetry.get("n_candidates", 1),
+            "n_failed_candidates": self.fit_telemetry.get("n_failed_candidates", 0),
+            "n_convergence_warnings": n_convergence_warnings
+            + self.fit_telemetry.get("n_convergence_warnings", 0),
+            "peak_memory_mb": peak_memory_mb,
+        }
+        return y_pred, telemetry
+
+    def _fit_forecast(self, division):
+        # Models receive 'X' as a NumPy view aligned with the rows of 'y'
+        training, forecasting = division.training, division.forecasting
+        return self._measure(
+            lambda: self.fit(training.get_y(), training.get_X_values()),
+            lambda: self.forecast(forecasting.get_y(), forecasting.get_X_values()),
+        )
 
-    def assess_error(self):
-        all_y_true, all_y_pred = self._join_predictions()
-        self.error_metrics.calculate_error_metrics(all_y_true, all_y_pred)
+    def _iter_warm_started_forecasts(self, order=None):
+        previous_division = None
+        for division in self.iter_divisions(order):
+            if previous_division is None:
+                training = division.training
+                fit = lambda: self.fit(training.get_y(), training.get_X_values())
+            else:
+                new_data = self.dataset.view(
+                    previous_division.forecasting_start, division.forecasting_start
+                )
+                fit = lambda: self.update(new_data.get_y(), new_data.get_X_values())
+            forecasting = division.forecasting
+            yield self._measure(
+                fit,
+                lambda: self.forecast(forecasting.get_y(), forecasting.get_X_values()),
+            )
+            previous_division = division
+
+    def _iter_forecasts(self, n_jobs=None, warm_start=False, order=None):
+        if warm_start:
+            if self.rolling:
+                raise ValueError(
+                    "'warm_start' extends the training data and cannot be used with 'rolling'."
+                )
+            if not self.supports_update():
+                raise ValueError(
+                    f"{self.get_model_name()} does not support 'warm_start'."
+                )
+            if n_jobs is not None and n_jobs != 1:
+                raise ValueError(
+                    "'warm_start' runs divisions sequentially and cannot be used with 'n_jobs'."
+                )
+            return self._iter_warm_started_forecasts(order)
+        if n_jobs is None or n_jobs == 1:
+            return (
+                self._fit_forecast(division) for division in self.iter_divisions(order)
+            )
+        # Each worker gets its own copy of the model; the inner fitting pools and
+        # native thread pools are limited to one job to avoid oversubscription
+        with parallel_config(backend="loky", inner_max_num_threads=1):
+            return Parallel(n_jobs=n_jobs, return_as="generator")(
+                delayed(_fit_forecast_in_worker)(self, division)
+                for division in self.iter_divisions(order)
+            )
+
+    def _validate_X(self, offsets):
+        # Missing values of X would otherwise reach the fit of the models that
+        # read it, e.g. as the exogenous variables of SARIMAX
+        if not self.uses_X or self.X is None or len(offsets) == 0:
+            return
+        X = self.X.iloc[
+            offsets["training_start"].min() : offsets["forecasting_end"].max()
+        ]
+        is_missing = X.isna().any(axis=1).to_numpy()
+        if is_missing.any():
+            raise ValueError(
+                f"'X' has missing values for {is_missing.sum()} dates used by the "
+                f"divisions, starting at {X.index[is_missing][0]}."
+            )
 
-    def run(self):
-        for division in self.divisions.values():
-            self.fit(division["training"].get_y(), division["training"].get_X())
-            y_pred = self.forecast(
-                division["forecasting"].get_y(), division["forecasting"].get_X()
+    def _get_n_rows_per_division(self):
+        if self.only_consider_last_of_each_intersection and self.intersect_forecasting:
+            return 1
+        return self.step_size
+
+    @staticmethod
+    def _read_checkpoints(fingerprint, test_path=False):
+        # Predictions of the divisions completed by previous runs, by index
+        try:
+            checkpoints = ResultsStore.get(test_path).read(
+                CHECKPOINTS_TABLE, filters={"fingerprint": fingerprint}
             )
-            division["forecasting"].set_y_pred(y_pred)
-        self.y_pred = pd.DataFrame()
-        for division in self.divisions.values():
-            self.y_pred = pd.concat(
-                [self.y_pred, division["forecasting"].get_y_pred()], axis=0
+        except (FileNotFoundError, ValueError):
+            return {}
+        return {
+            division: pd.DataFrame(json.loads(y_pred), columns=json.loads(columns))
+            for division, columns, y_pred in zip(
+                checkpoints["division"], checkpoints["columns"], checkpoints["y_pred"]
             )
+        }
+
+    def _save_checkpoint(
+        self,
+        fingerprint,
+        idx,
+        forecasting_start,
+        y_pred,
+        test_path=False,
+        connection=None,
+    ):
+        checkpoint = pd.DataFrame(
+            {
+                "fingerprint": fingerprint,
+                "division": int(idx),
+                "forecasting_start_date": self.y.index[forecasting_start],
+                "columns": json.dumps([str(c) for c in y_pred.columns]),
+                "y_pred": json.dumps(y_pred.to_numpy().tolist()),
+            },
+            index=[0],
+        )
+        ResultsStore.get(test_path).insert(
+            [(CHECKPOINTS_TABLE, [f"{fingerprint}-{int(idx)}"], checkpoint)],
+            connection=connection,
+        )
+
+    def run(
+        self,
+        n_jobs=None,
+        warm_start=False,
+        race=None,
+        checkpoint=False,
+        test_path=False,
+        trace_memory=False,
+    ):
+        """
+        :param race: Optional Race against a baseline model. Divisions are then
+            evaluated in the order of the race and the run stops early, marking
+            the result as censored, once the model is significantly worse than
+            the baseline.
+        :param checkpoint: If True, the predictions of each division are saved
+            as soon as it completes, keyed by fingerprint and division, and
+            divisions completed by previous runs are not fitted again. An
+            interrupted run then resumes where it stopped. The checkpoints are
+            deleted once the run completes.
+        :param trace_memory: If True, the telemetry includes the peak memory of
+            each division, traced with tracemalloc, which slows down the run.
+
+        Only the sampled divisions are run if 'build_divisions' was called with
+        'n_samples'.
+        """
+        self.trace_memory = trace_memory
+        n_divisions = self.get_n_divisions()
+        n_rows = self._get_n_rows_per_division()
+        windows = self.get_forecasting_windows(n_divisions)[:, -n_rows:, :]
+        offsets = self.get_division_offsets(n_divisions)
+        order = (
+            np.arange(n_divisions)
+            if self.division_sample is None
+            else self.division_sample
+        )
+        self._validate_X(offsets[order])
+        if race is not None:
+            if warm_start or (n_jobs is not None and n_jobs != 1):
+                raise ValueError(
+                    "'race' evaluates divisions one at a time and cannot be used with 'warm_start' or 'n_jobs'."
+                )
+            order = order[race.get_order(len(order))]
+            differences = []
+            baseline_losses = race.get_baseline_losses(self)
+        fingerprint = self.get_fingerprint() if checkpoint else None
+        completed = self._read_checkpoints(fingerprint, test_path) if checkpoint else {}
+        remaining = np.array(
+            [idx for idx in order if idx not in completed], dtype=np.int64
+        )
+        forecasts = itertools.chain(
+            ((idx, (completed[idx], None)) for idx in order if idx in completed),
+            zip(remaining, self._iter_forecasts(n_jobs, warm_start, remaining)),
+        )
+        y_pred_values = None
+        y_pred_columns = None
+        is_evaluated = np.zeros(n_divisions, dtype=bool)
+        telemetry = []
+        # One connection for every checkpoint of the run, each committed as soon
+        # as its division completes
+        store = ResultsStore.get(test_path)
+        connection = store.connect() if checkpoint else None
+        try:
+            for idx, (y_pred, division_telemetry) in forecasts:
+                if division_telemetry is not None:
+                    division_telemetry["division"] = int(idx)
+                    division_telemetry["forecasting_start_date"] = self.y.index[
+                        offsets["forecasting_start"][idx]
+                    ]
+                    telemetry.append(division_telemetry)
+                if checkpoint and idx not in completed:
+                    self._save_checkpoint(
+                        fingerprint,
+                        idx,
+                        offsets["forecasting_start"][idx],
+                        y_pred[-n_rows:],
+                        test_path,
+                        connection,
+                    )
+                if y_pred_values is None:
+                    y_pred_columns = y_pred.columns
+                    y_pred_values = np.empty(
+                        (n_divisions * n_rows, len(y_pred_columns))
+                    )
+                y_pred_values[idx * n_rows : (idx + 1) * n_rows] = np.asarray(y_pred)[
+                    -n_rows:
+                ]
+                is_evaluated[idx] = True
+                if race is not None:
+                    loss = race.get_losses(
+                        windows[idx],
+                        y_pred_values[idx * n_rows : (idx + 1) * n_rows],
+                        n_rows,
+                    )[0]
+                    differences.append(loss - baseline_losses[idx])
+                    if race.is_lost(differences):
+                        break
+            if checkpoint:
+                store.delete(
+                    CHECKPOINTS_TABLE, {"fingerprint": fingerprint}, connection
+                )
+        finally:
+            if connection is not None:
+                connection.close()
+        self.telemetry = pd.DataFrame(telemetry, columns=TELEMETRY_COLUMNS)
+        self.is_censored = bool(is_evaluated.sum() < len(order))
+        self.n_evaluated_divisions = int(is_evaluated.sum())
+        # Only the last 'n_rows' of each forecasting window are kept, selected by
+        # index arithmetic over the strided windows
+        starts = offsets["forecasting_start"][is_evaluated]
+        positions = (
+            starts[:, None] + np.arange(self.step_size - n_rows, self.step_size)
+        ).ravel()
+        windows = windows[is_evaluated]
+        self.y_true = pd.DataFrame(
+            windows.reshape(-1, windows.shape[-1]),
+            index=self.y.index[positions],
+            columns=self.y.columns,
+        )
+        self.y_pred = pd.DataFrame(
+            y_pred_values[np.repeat(is_evaluated, n_rows)],
+            index=self.y_true.index,
+            columns=y_pred_columns,
+        )
 
     def assess_error(self):
-        y_true = self.y
-        y_pred = self.y_pred
-        y_true = y_true.loc[lambda s: s.index.isin(y_pred.index)]
-        self.error_metrics.calculate_error_metrics(y_true, y_pred)
+        all_y_true, all_y_pred = self._join_predictions()
+        self.error_metrics.calculate_error_metrics(all_y_true, all_y_pred)
+        if self.division_sample is not None:
+            self.error_metrics.calculate_confidence_intervals(
+                all_y_true,
+                all_y_pred,
+                n_rows=self._get_n_rows_per_division(),
+                n_population=self.get_n_divisions(),
+            )
         self.is_error_assessed = True
 
     @property
@@ -280,7 +785,9 @@ class TimeSeriesModel:
         return self.dataset.time_frequency
 
     def to_pandas(self):
-        last_division = max(self.divisions.keys())
+        n_divisions = self.get_n_divisions()
+        first_division = self._get_division(0, n_divisions)
+        last_division = self._get_division(n_divisions - 1, n_divisions)
         info = {
             "model": self.get_model_name(),
             "id": self.id,
@@ -288,47 +795,80 @@ class TimeSeriesModel:
             "parquet_path": self.dataset.get_parquet_path(),
             "time_frequency": self.dataset.time_frequency,
             "step_size": self.step_size,
-            "forecasting_start_date": self.divisions[0]["forecasting"].get_y().index[0],
-            "forecasting_last_date": self.divisions[last_division]["forecasting"]
-            .get_y()
-            .index[-1],
-            "training_first_date": self.divisions[0]["training"].get_y().index[0],
+            "forecasting_start_date": self.y.index[first_division.forecasting_start],
+            "forecasting_last_date": self.y.index[last_division.forecasting_end - 1],
+            "training_first_date": self.y.index[first_division.training_start],
             "n_obs": len(self.dataset.get_y()),
-            "n_forecasting": len(self.divisions.values()),
+            "n_forecasting": n_divisions,
             "intersect_forecasting": self.intersect_forecasting,
             "only_consider_last_of_each_intersection": self.only_consider_last_of_each_intersection,
             "rolling": self.rolling,
+            "window_length": self.get_window_length(n_divisions),
+            "fingerprint": self.get_fingerprint(),
+            "censored": self.is_censored,
+            "n_evaluated_divisions": (
+                self.n_evaluated_divisions
+                if self.n_evaluated_divisions is not None
+                else n_divisions
+            ),
         }
         return pd.DataFrame(info, index=[0])
 
+    def get_params(self):
+        params = {
+            "step_size": self.step_size,
+            "forecasting_start_date": self.forecasting_start_date,
+            "n_forecasting": self.n_forecasting,
+            "intersect_forecasting": self.intersect_forecasting,
+            "only_consider_last_of_each_intersection": self.only_consider_last_of_each_intersection,
+            "rolling": self.rolling,
+            "window_length": self.window_length,
+            "time_frequency": self.time_frequency,
+        }
+        if self.sampling is not None:
+            params.update(self.sampling)
+        params.update({name: getattr(self, name) for name in self.hyperparameters})
+        return params
+
+    def get_fingerprint(self):
+        model_class = f"{type(self).__module__}.{type(self).__qualname__}"
+        params = json.dumps(
+            {name: to_sql_value(value) for name, value in self.get_params().items()},
+            sort_keys=True,
+            default=str,
+        )
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self.dataset.get_fingerprint().encode())
+        digest.update(model_class.encode())
+        digest.update(params.encode())
+        return digest.hexdigest()
+
     def is_it_already_in_results(self, test_path=False, not_check_cols=["id"]):
-        if self.is_div_built is False:
-            raise ValueError(
-                "Divisions have not been built yet. Use 'build_divisions' method before assessing if results already exist."
-            )
         if isinstance(not_check_cols, str):
             not_check_cols = [not_check_cols]
-        if not os.path.exists(PATH_TIME_SERIES_MODELS_RESULTS):
+        store = ResultsStore.get(test_path)
+        if not store.exists():
             return False
-        results = (
-            pd.read_csv(TEST_PATH_TIME_SERIES_MODELS_RESULTS, parse_dates=DATE_COLUMNS)
-            if test_path
-            else pd.read_csv(PATH_TIME_SERIES_MODELS_RESULTS, parse_dates=DATE_COLUMNS)
-        )
-        if results.empty:
+        if set(not_check_cols) == {"id"}:
+            # Results are keyed by fingerprint, which covers every other column
+            return store.contains(TIME_SERIES_MODELS_TABLE, self.get_fingerprint())
+        # Partial matches are not indexed and require scanning the results
+        try:
+            results = self.get_results_file(test_path)
+        except ValueError:
             return False
         current_result = self.to_pandas()
         for col in current_result.columns:
-            if col in not_check_cols:
+            if col in not_check_cols or col == "fingerprint":
                 continue
-            if "date" == col[:4]:
-                # convert to date
+            if col not in results.columns:
+                return False
+            if pd.isna(current_result[col].iloc[0]):
+                results = results.loc[lambda df: df[col].isna(), :]
+            else:
                 results = results.loc[
-                    lambda df: pd.to_datetime(df[col])
-                    == pd.to_datetime(current_result[col].iloc[0]),
-                    :,
+                    lambda df: df[col] == current_result[col].iloc[0], :
                 ]
-            results = results.loc[lambda df: df[col] == current_result[col].iloc[0], :]
             if results.empty:
                 return False
         return True
@@ -343,40 +883,48 @@ class TimeSeriesModel:
             self.assess_error()
         return self.error_metrics.to_pandas()
 
-    def save(self, save_error_metrics=True, test_path=False):
-        self._create_results_file()
-        self.to_pandas().to_csv(
-            path_or_buf=(
-                PATH_TIME_SERIES_MODELS_RESULTS
-                if not test_path
-                else TEST_PATH_TIME_SERIES_MODELS_RESULTS
-            ),
-            mode="a",
-            header=False,
-            index=False,
-        )
+    def get_results_key(self):
+        # Censored runs are keyed apart from complete ones, so that they are not
+        # found by is_it_already_in_results and are later evaluated in full
+        fingerprint = self.get_fingerprint()
+        return f"{fingerprint}-censored" if self.is_censored else fingerprint
+
+    def get_results_rows(self):
+        return TIME_SERIES_MODELS_TABLE, [self.get_results_key()], self.to_pandas()
+
+    def get_telemetry_rows(self):
+        telemetry = self.telemetry.copy()
+        telemetry.insert(0, "fingerprint", self.get_fingerprint())
+        telemetry.insert(0, "id", self.id)
+        telemetry.insert(0, "y", self.dataset.y.columns[0])
+        telemetry.insert(0, "model", self.get_model_name())
+        keys = [f"{self.id}-{division}" for division in telemetry["division"]]
+        return TELEMETRY_TABLE, keys, telemetry
+
+    def save(self, save_error_metrics=True, test_path=False, writer=None):
+        rows = [self.get_results_rows()]
+        if self.telemetry is not None and not self.telemetry.empty:
+            rows.append(self.get_telemetry_rows())
         if save_error_metrics:
             self.error_metrics.set_parquet_path(self.dataset.get_parquet_path())
-            self.error_metrics.save(test_path=test_path)
+            rows.append(self.error_metrics.get_results_rows())
+        if writer is not None:
+            writer.put(rows)
+        else:
+            ResultsStore.get(test_path).insert(rows)
 
     @classmethod
     def get_results_file(cls, test_path=False):
-        file = (
-            TEST_PATH_TIME_SERIES_MODELS_RESULTS
-            if test_path
-            else PATH_TIME_SERIES_MODELS_RESULTS
+        return ResultsStore.get(test_path).read(
+            TIME_SERIES_MODELS_TABLE, parse_dates=DATE_COLUMNS
+        )
+
+    @classmethod
+    def get_telemetry_file(cls, test_path=False):
+        return ResultsStore.get(test_path).read(
+            TELEMETRY_TABLE, parse_dates=["forecasting_start_date"]
         )
-        if not os.path.exists(file):
-            raise FileNotFoundError(f"File '{file}' not found.")
-        return pd.read_csv(file, parse_dates=DATE_COLUMNS)
 
     @classmethod
     def get_error_metrics_file(cls, test_path=False):
         return ErrorMetrics.get_results_file(test_path=test_path)
-
-    def _create_results_file(self):
-        if not os.path.exists(PATH_TIME_SERIES_MODELS_RESULTS):
-            columns = list(self.to_pandas().columns)
-            pd.DataFrame(columns=columns).to_csv(
-                PATH_TIME_SERIES_MODELS_RESULTS, index=False
-            )
@@ -1,9 +1,11 @@
 # holt_winters_forecasting.py
 
+import numpy as np
 import pandas as pd
 from statsmodels.tsa.holtwinters import ExponentialSmoothing
 from models.time_series_model import TimeSeriesModel
 from models.dataset import FREQUENCY_SEASONAL_MAP, Dataset
+from models.utils import get_optimized_params
 from typing import Union
 import datetime
 
@@ -11,6 +13,7 @@ import datetime
 class HoltWintersForecasting(TimeSeriesModel):
     name = "Holt-Winters Forecasting"
     code = "HWT"
+    hyperparameters = ("seasonal", "trend", "damped_trend")
 
     def __init__(
         self,
@@ -28,6 +31,7 @@ class HoltWintersForecasting(TimeSeriesModel):
         seasonal: str = "add",
         trend: str = "add",
         damped_trend: bool = False,
+        window_length: int = None,
     ):
         super().__init__(
             y,
@@ -41,6 +45,7 @@ class HoltWintersForecasting(TimeSeriesModel):
             only_consider_last_of_each_intersection,
             rolling,
             time_frequency,
+            window_length,
         )
         self.seasonal = seasonal
         self.trend = trend
@@ -61,6 +66,7 @@ class HoltWintersForecasting(TimeSeriesModel):
         seasonal: str = "add",
         trend: str = "add",
         damped_trend: bool = False,
+        window_length: int = None,
     ):
         self = super().from_dataset(
             dataset,
@@ -70,6 +76,7 @@ class HoltWintersForecasting(TimeSeriesModel):
             intersect_forecasting,
             only_consider_last_of_each_intersection,
             rolling,
+            window_length,
         )
         self.seasonal = seasonal
         self.trend = trend
@@ -78,18 +85,31 @@ class HoltWintersForecasting(TimeSeriesModel):
         self.fitted_model = None
         return self
 
-    @TimeSeriesModel._fitted
-    def fit(self, y, X=None):
-        seasonal_periods = self._get_seasonal_periods()
-        self.model = ExponentialSmoothing(
-            y.iloc[:, 0].values,
+    def _build_model(self, values):
+        return ExponentialSmoothing(
+            values,
             seasonal=self.seasonal,
             trend=self.trend,
             damped_trend=self.damped_trend,
-            seasonal_periods=seasonal_periods,
+            seasonal_periods=self._get_seasonal_periods(),
         )
+
+    @TimeSeriesModel._fitted
+    def fit(self, y, X=None):
+        self.model = self._build_model(y.iloc[:, 0].values)
         self.fitted_model = self.model.fit()
 
+    @TimeSeriesModel._fitted
+    def update(self, y, X=None):
+        if not self.fitted_model:
+            raise ValueError("The model must be fitted before updating.")
+        self.model = self._build_model(
+            np.concatenate([self.model.endog, y.iloc[:, 0].values])
+        )
+        self.fitted_model = self.model.fit(
+            start_params=get_optimized_params(self.fitted_model), use_brute=False
+        )
+
     def forecast(self, y, X=None):
         if not self.fitted_model:
             raise ValueError("The model must be fitted before forecasting.")
@@ -22,6 +22,7 @@ PARAM_GRID_DEFAULT = {
 class LstmForecasting(TimeSeriesModel):
     name = "Long Short Term Memory"
     code = "LST"
+    hyperparameters = ("n_splits", "param_grid")
 
     def __init__(
         self,
@@ -38,6 +39,7 @@ class LstmForecasting(TimeSeriesModel):
         time_frequency: str = None,
         n_splits: int = 3,
         param_grid: Dict[str, List[Any]] = None,
+        window_length: int = None,
     ):
         """
         A minimal LSTM-based model that uses time-series cross-validation to tune hyperparameters.
@@ -57,6 +59,7 @@ class LstmForecasting(TimeSeriesModel):
             only_consider_last_of_each_intersection,
             rolling,
             time_frequency,
+            window_length,
         )
         self.n_splits = n_splits
         self.param_grid = PARAM_GRID_DEFAULT if param_grid is None else param_grid
@@ -76,6 +79,7 @@ class LstmForecasting(TimeSeriesModel):
         rolling: bool = False,
         n_splits: int = 3,
         param_grid: Dict[str, List[Any]] = None,
+        window_length: int = None,
     ):
         self = super().from_dataset(
             dataset,
@@ -85,7 +89,9 @@ class LstmForecasting(TimeSeriesModel):
             intersect_forecasting,
             only_consider_last_of_each_intersection,
             rolling,
+            window_length,
         )
+        self.n_splits = n_splits
         self.param_grid = PARAM_GRID_DEFAULT if param_grid is None else param_grid
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.best_params = None
@@ -190,7 +196,9 @@ class LstmForecasting(TimeSeriesModel):
         best_score = np.inf
         best_combo = None
         keys = list(self.param_grid.keys())
+        self.fit_telemetry = {"n_candidates": 0}
         for values in itertools.product(*(self.param_grid[k] for k in keys)):
+            self.fit_telemetry["n_candidates"] += 1
             combo = dict(zip(keys, values))
             hidden_size = combo.get("hidden_size")
             num_layers = combo.get("num_layers")
@@ -9,9 +9,30 @@ class MeanForecasting(TimeSeriesModel):
 
     @TimeSeriesModel._fitted
     def fit(self, y, X=None):
-        self.prediction = y.iloc[:, :].dropna().values.mean()
+        values = y.iloc[:, :].dropna().values
+        self.sum = values.sum()
+        self.count = values.size
+        self.prediction = self.sum / self.count
+
+    @TimeSeriesModel._fitted
+    def update(self, y, X=None):
+        values = y.iloc[:, :].dropna().values
+        self.sum += values.sum()
+        self.count += values.size
+        self.prediction = self.sum / self.count
 
     def forecast(self, y, X=None):
         return pd.DataFrame(
             np.repeat(self.prediction, len(y.index)), index=y.index, columns=y.columns
         )
+
+    @staticmethod
+    def forecast_panel(values, entity_starts, origins):
+        is_observed = ~np.isnan(values)
+        cumulative_sum = np.concatenate(
+            [[0.0], np.cumsum(np.where(is_observed, values, 0.0))]
+        )
+        cumulative_count = np.concatenate([[0], np.cumsum(is_observed)])
+        return (cumulative_sum[origins] - cumulative_sum[entity_starts]) / (
+            cumulative_count[origins] - cumulative_count[entity_starts]
+        )
@@ -11,7 +11,15 @@ class NaiveForecasting(TimeSeriesModel):
     def fit(self, y, X=None):
         self.prediction = y.iloc[-1, 0]
 
+    @TimeSeriesModel._fitted
+    def update(self, y, X=None):
+        self.prediction = y.iloc[-1, 0]
+
     def forecast(self, y, X=None):
         return pd.DataFrame(
             np.repeat(self.prediction, len(y.index)), index=y.index, columns=y.columns
         )
+
+    @staticmethod
+    def forecast_panel(values, entity_starts, origins):
+        return values[origins - 1]
@@ -3,6 +3,7 @@
 import pandas as pd
 import numpy as np
 from statsmodels.tsa.statespace.sarimax import SARIMAX
+from statsmodels.tools.sm_exceptions import ConvergenceWarning
 from models.time_series_model import TimeSeriesModel
 from typing import Union
 from models.dataset import FREQUENCY_SEASONAL_MAP, Dataset
@@ -12,28 +13,46 @@ import warnings
 import itertools
 
 
-def _try_sarima(params, y, selection_criterion):
+def _try_sarima(params, y, selection_criterion, X=None):
+    # Returns the candidate, or None if its fit failed, and the number of
+    # convergence warnings raised while fitting it
     p, d, q, P, D, Q, m = params
-    try:
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore")
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        try:
             model = SARIMAX(
                 endog=y,
+                exog=X,
                 order=(p, d, q),
                 seasonal_order=(P, D, Q, m),
                 enforce_stationarity=False,
                 enforce_invertibility=False,
             )
             results = model.fit(disp=False)
-        score = results.aic if selection_criterion == "aic" else results.bic
-        return (score, (p, d, q), (P, D, Q, m))
-    except Exception:
-        return None
+            score = results.aic if selection_criterion == "aic" else results.bic
+            candidate = (score, (p, d, q), (P, D, Q, m))
+        except Exception:
+            candidate = None
+    n_convergence_warnings = sum(
+        issubclass(warning.category, ConvergenceWarning) for warning in caught
+    )
+    return candidate, n_convergence_warnings
 
 
 class SarimaForecasting(TimeSeriesModel):
     name = "SARIMA Forecasting"
     code = "SAR"
+    uses_X = True
+    # 'order' and 'seasonal_order' are overwritten by the search in 'fit'
+    hyperparameters = (
+        "selection_criterion",
+        "max_p",
+        "max_q",
+        "max_d",
+        "max_seasonal_p",
+        "max_seasonal_q",
+        "max_seasonal_d",
+    )
 
     def __init__(
         self,
@@ -57,6 +76,7 @@ class SarimaForecasting(TimeSeriesModel):
         max_seasonal_p=1,
         max_seasonal_q=1,
         max_seasonal_d=1,
+        window_length: int = None,
     ):
         super().__init__(
             y,
@@ -70,6 +90,7 @@ class SarimaForecasting(TimeSeriesModel):
             only_consider_last_of_each_intersection,
             rolling,
             time_frequency,
+            window_length,
         )
         if self.time_frequency not in FREQUENCY_SEASONAL_MAP.keys():
             raise ValueError(
@@ -106,6 +127,7 @@ class SarimaForecasting(TimeSeriesModel):
         max_seasonal_p=1,
         max_seasonal_q=1,
         max_seasonal_d=1,
+        window_length: int = None,
     ):
         self = super().from_dataset(
             dataset,
@@ -115,6 +137,7 @@ class SarimaForecasting(TimeSeriesModel):
             intersect_forecasting,
             only_consider_last_of_each_intersection,
             rolling,
+            window_length,
         )
         self.order = order
         self.seasonal_order = seasonal_order
@@ -149,12 +172,17 @@ class SarimaForecasting(TimeSeriesModel):
             )
         )
 
-        results = Parallel(n_jobs=-1)(
-            delayed(_try_sarima)(params, y, self.selection_criterion)
+        results = Parallel(n_jobs=self.fit_n_jobs)(
+            delayed(_try_sarima)(params, y, self.selection_criterion, X)
             for params in param_combinations
         )
 
-        valid_results = [res for res in results if res is not None]
+        valid_results = [res for res, _ in results if res is not None]
+        self.fit_telemetry = {
+            "n_candidates": len(results),
+            "n_failed_candidates": len(results) - len(valid_results),
+            "n_convergence_warnings": sum(n for _, n in results),
+        }
 
         if not valid_results:
             raise Exception("No valid SARIMA model found with the given parameters.")
@@ -168,6 +196,7 @@ class SarimaForecasting(TimeSeriesModel):
 
         self.model = SARIMAX(
             y,
+            exog=X,
             order=self.order,
             seasonal_order=self.seasonal_order,
             enforce_stationarity=False,
@@ -175,10 +204,21 @@ class SarimaForecasting(TimeSeriesModel):
         )
         self.fitted_model = self.model.fit(disp=False)
 
+    @TimeSeriesModel._fitted
+    def update(self, y, X=None):
+        if not self.fitted_model:
+            raise ValueError("The model must be fitted before updating.")
+        # Keeps the selected orders and refits from the previous parameters;
+        # raw values are appended as irregular date indexes cannot be extended
+        self.fitted_model = self.fitted_model.append(
+            y.values, exog=X, refit=True, fit_kwargs={"disp": False}
+        )
+        self.model = self.fitted_model.model
+
     def forecast(self, y, X=None):
         forecast_length = len(y)
         if not self.fitted_model:
             raise ValueError("The model must be fitted before forecasting.")
-        forecast = self.fitted_model.get_forecast(steps=forecast_length)
+        forecast = self.fitted_model.get_forecast(steps=forecast_length, exog=X)
         forecast_df = forecast.summary_frame()["mean"].iloc[-forecast_length:].values
         return pd.DataFrame(forecast_df, index=y.index, columns=["forecast"])
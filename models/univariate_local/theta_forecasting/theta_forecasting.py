@@ -2,6 +2,7 @@ import pandas as pd
 import numpy as np
 from models.time_series_model import TimeSeriesModel
 from statsmodels.tsa.holtwinters import SimpleExpSmoothing
+from models.utils import get_optimized_params
 
 
 class ThetaForecasting(TimeSeriesModel):
@@ -10,7 +11,17 @@ class ThetaForecasting(TimeSeriesModel):
 
     @TimeSeriesModel._fitted
     def fit(self, y, X=None):
-        self.base_model = SimpleExpSmoothing(y.values).fit()
+        self.history = y.values
+        self.base_model = SimpleExpSmoothing(self.history).fit()
+
+    @TimeSeriesModel._fitted
+    def update(self, y, X=None):
+        if self.base_model is None:
+            raise ValueError("The model must be fitted before updating.")
+        self.history = np.concatenate([self.history, y.values])
+        self.base_model = SimpleExpSmoothing(self.history).fit(
+            start_params=get_optimized_params(self.base_model), use_brute=False
+        )
 
     def forecast(self, y, X=None):
         forecast_values = self.base_model.forecast(len(y))
@@ -28,6 +28,15 @@ def create_simulated_X(
     return X
 
 
+def get_optimized_params(fitted_model):
+    """
+    Return the optimized parameters of a fitted statsmodels Holt-Winters style
+    results object, in the layout expected by the 'start_params' of 'fit'.
+    """
+    params_formatted = fitted_model.params_formatted
+    return params_formatted.loc[params_formatted["optimized"], "param"].values
+
+
 def _calc_periods_per_year(dates) -> str:
     """
     Given a list/array-like of dates, attempt to infer the frequency
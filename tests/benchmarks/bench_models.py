@@ -0,0 +1,187 @@
+"""
+Speed and memory benchmarks for the models package.
+
+These are not collected by the default test run. Run them with:
+
+    python -m pytest tests/benchmarks/bench_models.py \
+        --benchmark-storage=file://tests/benchmarks/baselines \
+        --benchmark-compare
+
+and refresh the stored baseline with '--benchmark-save=baseline'. The peak
+traced memory of each benchmarked call is stored in 'extra_info'.
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+import tracemalloc
+
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+)
+
+pytest.importorskip("pytest_benchmark")
+
+from models.utils import create_simulated_X, create_simulated_y
+from models.dataset import Dataset
+from models.time_series_model import TimeSeriesModel
+from models.univariate_local import (
+    HoltWintersForecasting,
+    LstmForecasting,
+    MeanForecasting,
+    NaiveForecasting,
+    SarimaForecasting,
+    ThetaForecasting,
+)
+from tests.utils import del_test_files
+
+
+SERIES_LENGTHS = [1_000, 10_000, 50_000]
+ORIGIN_COUNTS = [10, 100, 1_000]
+
+MODEL_KWARGS = {
+    MeanForecasting: {},
+    NaiveForecasting: {},
+    ThetaForecasting: {},
+    HoltWintersForecasting: {},
+    SarimaForecasting: {
+        "max_p": 1,
+        "max_q": 0,
+        "max_d": 0,
+        "max_seasonal_p": 0,
+        "max_seasonal_q": 0,
+        "max_seasonal_d": 0,
+    },
+    LstmForecasting: {
+        "n_splits": 2,
+        "param_grid": {
+            "hidden_size": [8],
+            "num_layers": [1],
+            "epochs": [1],
+            "learning_rate": [0.01],
+            "batch_size": [16],
+        },
+    },
+}
+MODEL_N_FORECASTING = {SarimaForecasting: 3, LstmForecasting: 2}
+
+
+def record_peak_memory(benchmark, func, *args, **kwargs):
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        benchmark.extra_info["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.fixture(autouse=True)
+def seed():
+    np.random.seed(0)
+
+
+@pytest.mark.parametrize("n_periods", SERIES_LENGTHS)
+def test_dataset_init(benchmark, n_periods):
+    y = create_simulated_y(n_periods=n_periods)
+    X = create_simulated_X(n_periods=n_periods)
+    record_peak_memory(benchmark, Dataset, y, X, time_frequency="D")
+    benchmark(Dataset, y, X, time_frequency="D")
+
+
+@pytest.mark.parametrize("n_periods", SERIES_LENGTHS)
+def test_organize_time_series(benchmark, n_periods):
+    y = create_simulated_y(n_periods=n_periods, to_frame=True)
+    benchmark(Dataset.organize_time_series, y, None, None)
+
+
+@pytest.mark.parametrize("n_forecasting", ORIGIN_COUNTS)
+def test_build_divisions(benchmark, n_forecasting):
+    y = create_simulated_y(n_periods=10_000)
+    model = TimeSeriesModel(y, n_forecasting=n_forecasting, time_frequency="D")
+    record_peak_memory(benchmark, model.build_divisions)
+    benchmark(model.build_divisions)
+
+
+@pytest.mark.parametrize("n_forecasting", ORIGIN_COUNTS)
+def test_iter_divisions(benchmark, n_forecasting):
+    y = create_simulated_y(n_periods=10_000)
+    model = TimeSeriesModel(y, n_forecasting=n_forecasting, time_frequency="D")
+
+    def consume_divisions():
+        for division in model.iter_divisions():
+            division.training, division.forecasting
+
+    benchmark(consume_divisions)
+
+
+@pytest.mark.parametrize("model_class", list(MODEL_KWARGS.keys()))
+def test_run(benchmark, model_class):
+    y = create_simulated_y(n_periods=1_000)
+    model = model_class(
+        y,
+        n_forecasting=MODEL_N_FORECASTING.get(model_class, 12),
+        time_frequency="D",
+        **MODEL_KWARGS[model_class],
+    )
+    record_peak_memory(benchmark, model.run)
+    benchmark.pedantic(model.run, rounds=3, iterations=1)
+
+
+@pytest.mark.parametrize("model_class", [MeanForecasting, NaiveForecasting])
+@pytest.mark.parametrize("n_forecasting", ORIGIN_COUNTS)
+def test_run_origins(benchmark, model_class, n_forecasting):
+    y = create_simulated_y(n_periods=10_000)
+    model = model_class(y, n_forecasting=n_forecasting, time_frequency="D")
+    record_peak_memory(benchmark, model.run)
+    benchmark(model.run)
+
+
+@pytest.mark.parametrize("n_forecasting", ORIGIN_COUNTS)
+def test_assess_error(benchmark, n_forecasting):
+    y = create_simulated_y(n_periods=10_000)
+    model = NaiveForecasting(y, n_forecasting=n_forecasting, time_frequency="D")
+    model.run()
+    benchmark(model.assess_error)
+
+
+@pytest.mark.parametrize("n_entities", [100, 10_000])
+def test_run_panel(benchmark, n_entities):
+    n_periods = 120
+    panel = pd.DataFrame(
+        {
+            "entity": np.repeat(np.arange(n_entities), n_periods),
+            "date": np.tile(
+                pd.date_range("2000-01-31", periods=n_periods, freq="ME"), n_entities
+            ),
+            "value": np.random.normal(0, 1, n_entities * n_periods),
+        }
+    )
+    record_peak_memory(benchmark, MeanForecasting.run_panel, panel)
+    benchmark(MeanForecasting.run_panel, panel)
+
+
+@pytest.fixture
+def saved_results():
+    del_test_files()
+    y = create_simulated_y(n_periods=1_000)
+    for n_forecasting in range(1, 101):
+        model = NaiveForecasting(y, n_forecasting=n_forecasting, time_frequency="D")
+        model.run()
+        model.assess_error()
+        model.save(test_path=True)
+    yield y
+    del_test_files()
+
+
+def test_save(benchmark, saved_results):
+    model = NaiveForecasting(saved_results, n_forecasting=200, time_frequency="D")
+    model.run()
+    model.assess_error()
+    benchmark(model.save, test_path=True)
+
+
+def test_is_it_already_in_results(benchmark, saved_results):
+    model = NaiveForecasting(saved_results, n_forecasting=50, time_frequency="D")
+    assert benchmark(model.is_it_already_in_results, test_path=True)
@@ -17,6 +17,8 @@ from models.univariate_local import (
 )
 
 from models.time_series_model import TEST_PATH_TIME_SERIES_MODELS_RESULTS
+from models.results_writer import ResultsWriter
+from models.results_store import ResultsStore, CHECKPOINTS_TABLE
 from models.error_metrics import TEST_PATH_ERROR_METRICS_RESULTS
 
 
@@ -49,7 +51,7 @@ def test_saving_time_series_models():
     um.assess_error()
     um.save(save_error_metrics=False, test_path=True)
     assert os.path.exists(TEST_PATH_TIME_SERIES_MODELS_RESULTS)
-    ts_model_frame = pd.read_csv(TEST_PATH_TIME_SERIES_MODELS_RESULTS)
+    ts_model_frame = TimeSeriesModel.get_results_file(test_path=True)
     assert len(ts_model_frame.index) == 1
     assert "y" in list(ts_model_frame.columns) and "model" in list(
         ts_model_frame.columns
@@ -64,12 +66,132 @@ def test_saving_error_metrics():
     um.run()
     um.assess_error()
     um.save(save_error_metrics=True, test_path=True)
-    assert os.path.exists(TEST_PATH_TIME_SERIES_MODELS_RESULTS)
-    error_metrics_frame = pd.read_csv(TEST_PATH_TIME_SERIES_MODELS_RESULTS)
+    assert os.path.exists(TEST_PATH_ERROR_METRICS_RESULTS)
+    error_metrics_frame = TimeSeriesModel.get_error_metrics_file(test_path=True)
     assert len(error_metrics_frame.index) == 1
     assert "y" in list(error_metrics_frame.columns) and "model" in list(
         error_metrics_frame.columns
     )
-    ts_model_frame = pd.read_csv(TEST_PATH_TIME_SERIES_MODELS_RESULTS)
+    ts_model_frame = TimeSeriesModel.get_results_file(test_path=True)
     assert ts_model_frame["id"].iloc[0] == error_metrics_frame["id"].iloc[0]
     assert ts_model_frame["model"].iloc[0] == error_metrics_frame["model"].iloc[0]
+
+
+@del_files
+def test_is_it_already_in_results():
+    y = create_simulated_y()
+    um = NaiveForecasting(y=y, n_forecasting=12, time_frequency="D")
+    assert not um.is_it_already_in_results(test_path=True)
+    um.run()
+    um.assess_error()
+    um.save(test_path=True)
+    assert um.is_it_already_in_results(test_path=True)
+    assert um.is_it_already_in_results(test_path=True, not_check_cols=["id", "n_obs"])
+    other = NaiveForecasting(y=y, n_forecasting=6, time_frequency="D")
+    assert not other.is_it_already_in_results(test_path=True)
+
+
+def test_fingerprint_changes_with_data_and_params():
+    y = create_simulated_y()
+    model = HoltWintersForecasting(y=y, n_forecasting=12, time_frequency="D")
+    same = HoltWintersForecasting(y=y.copy(), n_forecasting=12, time_frequency="D")
+    assert model.get_fingerprint() == same.get_fingerprint()
+    changed_y = y.copy()
+    changed_y.iloc[0] += 1
+    changed_data = HoltWintersForecasting(
+        y=changed_y, n_forecasting=12, time_frequency="D"
+    )
+    assert model.get_fingerprint() != changed_data.get_fingerprint()
+    changed_params = HoltWintersForecasting(
+        y=y, n_forecasting=12, time_frequency="D", damped_trend=True
+    )
+    assert model.get_fingerprint() != changed_params.get_fingerprint()
+    changed_model = MeanForecasting(y=y, n_forecasting=12, time_frequency="D")
+    assert model.get_fingerprint() != changed_model.get_fingerprint()
+
+
+@del_files
+def test_saving_with_results_writer():
+    y = create_simulated_y()
+    with ResultsWriter(test_path=True, flush_interval=60, batch_size=100) as writer:
+        for n_forecasting in range(1, 6):
+            um = NaiveForecasting(y=y, n_forecasting=n_forecasting, time_frequency="D")
+            um.run()
+            um.assess_error()
+            um.save(test_path=True, writer=writer)
+        writer.flush()
+        assert len(TimeSeriesModel.get_results_file(test_path=True).index) == 5
+        um = NaiveForecasting(y=y, n_forecasting=6, time_frequency="D")
+        um.run()
+        um.assess_error()
+        um.save(test_path=True, writer=writer)
+    assert um.is_it_already_in_results(test_path=True)
+    assert len(TimeSeriesModel.get_results_file(test_path=True).index) == 6
+    assert len(TimeSeriesModel.get_error_metrics_file(test_path=True).index) == 6
+
+
+def test_closed_results_writer_refuses_rows_and_flushes():
+    writer = ResultsWriter(test_path=True)
+    writer.close()
+    with pytest.raises(ValueError):
+        writer.flush()
+    with pytest.raises(ValueError):
+        writer.put([])
+
+
+class InterruptedForecasting(NaiveForecasting):
+    n_forecasts_before_interruption = None
+    n_forecasts = 0
+
+    def forecast(self, y, X=None):
+        if InterruptedForecasting.n_forecasts == self.n_forecasts_before_interruption:
+            raise KeyboardInterrupt
+        InterruptedForecasting.n_forecasts += 1
+        return super().forecast(y, X)
+
+
+@del_files
+def test_run_resumes_from_checkpoints():
+    y = create_simulated_y()
+    InterruptedForecasting.n_forecasts_before_interruption = 5
+    um = InterruptedForecasting(y=y, n_forecasting=12, step_size=2)
+    with pytest.raises(KeyboardInterrupt):
+        um.run(checkpoint=True, test_path=True)
+    store = ResultsStore.get(test_path=True)
+    assert len(store.read(CHECKPOINTS_TABLE)) == 5
+    InterruptedForecasting.n_forecasts_before_interruption = None
+    InterruptedForecasting.n_forecasts = 0
+    resumed = InterruptedForecasting(y=y, n_forecasting=12, step_size=2)
+    resumed.run(checkpoint=True, test_path=True)
+    assert InterruptedForecasting.n_forecasts == 7
+    # Checkpoints of a completed run are deleted
+    assert store.read(CHECKPOINTS_TABLE).empty
+    full = NaiveForecasting(y=y, n_forecasting=12, step_size=2)
+    full.run()
+    pd.testing.assert_frame_equal(resumed.y_pred, full.y_pred, check_names=False)
+    pd.testing.assert_frame_equal(resumed.y_true, full.y_true)
+
+
+@del_files
+def test_saving_division_telemetry():
+    y = create_simulated_y(n_periods=300)
+    um = SarimaForecasting(
+        y=y,
+        n_forecasting=3,
+        max_p=1,
+        max_q=0,
+        max_d=0,
+        max_seasonal_p=0,
+        max_seasonal_q=0,
+        max_seasonal_d=0,
+    )
+    um.run()
+    assert len(um.telemetry.index) == 3
+    assert (um.telemetry["n_candidates"] > 1).all()
+    assert (um.telemetry["fit_time"] > 0).all()
+    um.assess_error()
+    um.save(test_path=True)
+    telemetry = TimeSeriesModel.get_telemetry_file(test_path=True)
+    assert list(telemetry["division"]) == [0, 1, 2]
+    assert (telemetry["fingerprint"] == um.get_fingerprint()).all()
+    assert (telemetry["n_failed_candidates"] <= telemetry["n_candidates"]).all()
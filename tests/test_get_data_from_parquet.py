@@ -1,4 +1,5 @@
 import pytest
+import numpy as np
 import pandas as pd
 import sys
 import os
@@ -55,3 +56,115 @@ def test_get_all_data_from_parquet_table():
         assert table.columns[0].lower() == "date"
     else:
         assert len(table.columns) == 0
+
+
+@pytest.fixture
+def parquet_table(tmp_path, monkeypatch):
+    monkeypatch.setattr("models.dataset.PATH_DATA_OUTPUT", str(tmp_path))
+    Dataset.reset_tables_in_memory()
+    table = create_simulated_X(n_periods=100, n_features=3).rename_axis("date")
+    table.reset_index().to_parquet(tmp_path / "table.parquet")
+    yield table
+    Dataset.reset_tables_in_memory()
+
+
+@pytest.fixture
+def parquet_reads(monkeypatch):
+    # (columns, filters, number of rows) of every call to pd.read_parquet
+    reads = []
+    read_parquet = pd.read_parquet
+
+    def recording_read_parquet(path, columns=None, filters=None, **kwargs):
+        table = read_parquet(path, columns=columns, filters=filters, **kwargs)
+        reads.append((columns, filters, len(table)))
+        return table
+
+    monkeypatch.setattr(pd, "read_parquet", recording_read_parquet)
+    return reads
+
+
+def test_parquet_reads_are_projected_to_columns(parquet_table, parquet_reads):
+    dataset = Dataset.from_parquet(y="table/x1", X=["table/x2"])
+    assert [columns for columns, _, _ in parquet_reads] == [
+        ["x1", "date"],
+        ["x2", "date"],
+    ]
+    assert dataset.get_y()["x1"].equals(parquet_table["x1"])
+    assert Dataset.get_in_memory_tables_names() == [dataset.get_parquet_path()]
+    datasets = Dataset.from_parquet_all_from_table(y_table="table")
+    assert parquet_reads[-1][0] == ["x0", "date"]
+    assert [d.get_y().columns[0] for d in datasets] == ["x0", "x1", "x2"]
+    table = Dataset.get_table_from_memory("table")
+    assert list(table.columns) == ["date", "x0", "x1", "x2"]
+
+
+def test_X_is_read_once_per_table(parquet_table, parquet_reads, tmp_path):
+    other_table = create_simulated_X(n_periods=50, n_features=2).rename_axis("date")
+    other_table.columns = ["z0", "z1"]
+    other_table.reset_index().to_parquet(tmp_path / "other_table.parquet")
+    X = Dataset._get_variables(
+        ["table/x2", "other_table/z1", "table/x0", "other_table/z0"]
+    )
+    assert parquet_reads == [
+        (["x2", "x0", "date"], None, 100),
+        (["z1", "z0", "date"], None, 50),
+    ]
+    assert list(X.columns) == ["x2", "z1", "x0", "z0"]
+    assert len(X.index) == 100
+    assert X["z0"].isna().sum() == 50
+    with pytest.raises(ValueError):
+        Dataset._get_variables(["table/x9"])
+
+
+def test_date_filters_are_pushed_down(parquet_table, parquet_reads, tmp_path):
+    parquet_table.reset_index().to_parquet(
+        tmp_path / "table.parquet", row_group_size=10
+    )
+    start, end = parquet_table.index[20], parquet_table.index[44]
+    dataset = Dataset.from_parquet(
+        y="table/x1", X=["table/x2"], filter_start_date=start, filter_end_date=end
+    )
+    assert parquet_reads == [
+        (["x1", "date"], [("date", ">=", start), ("date", "<=", end)], 25),
+        (["x2", "date"], [("date", ">=", start), ("date", "<=", end)], 25),
+    ]
+    pd.testing.assert_frame_equal(
+        dataset.get_y(), parquet_table.loc[start:end, ["x1"]], check_freq=False
+    )
+    assert all(key[2] == (start, end) for key in Dataset.get_in_memory_tables())
+    # Full columns already in memory are filtered without reading again
+    Dataset.from_parquet(y="table/x0")
+    Dataset.from_parquet(y="table/x0", filter_start_date=start)
+    assert [columns for columns, _, _ in parquet_reads[2:]] == [["x0", "date"]]
+    datasets = Dataset.from_parquet_all_from_table(y_table="table", filter_end_date=end)
+    assert parquet_reads[-1] == (["x1", "x2", "date"], [("date", "<=", end)], 45)
+    assert [len(d) for d in datasets] == [45, 45, 45]
+
+
+def test_cached_columns_have_own_buffers(parquet_table):
+    X = Dataset._get_variables(["table/x0", "table/x1", "table/x2"])
+    cache = Dataset.get_in_memory_tables()
+    columns = [cache[key] for key in list(cache)]
+    assert not np.shares_memory(columns[0].to_numpy(), columns[1].to_numpy())
+    # Values of the three columns plus the date index counted once, up to
+    # the rounding of its share per column
+    assert abs(cache.get_stats()["n_bytes"] - (3 * 100 * 8 + 100 * 8)) < 3
+    assert X.shape == (100, 3)
+
+
+def test_table_columns_in_use_are_pinned(parquet_table, parquet_reads, tmp_path):
+    other_table = create_simulated_X(n_periods=100, n_features=1).rename_axis("date")
+    other_table.columns = ["z0"]
+    other_table.reset_index().to_parquet(tmp_path / "other_table.parquet")
+    Dataset._get_variables(["table/x0", "table/x1", "table/x2"])
+    # Anything not pinned is evicted on the next insert
+    Dataset.get_in_memory_tables().max_bytes = 1
+    parquet_reads.clear()
+    datasets = Dataset.from_parquet_all_from_table(
+        y_table="table",
+        X=["other_table/z0"],
+        filter_start_date=parquet_table.index[50],
+    )
+    # The full columns already in memory are used and never read again
+    assert [columns for columns, _, _ in parquet_reads] == [["z0", "date"]] * 3
+    assert [len(d) for d in datasets] == [50, 50, 50]
@@ -0,0 +1,99 @@
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from models.utils import create_simulated_y
+from models.error_metrics import METRICS
+from models.panel_dataset import PanelDataset
+from models.univariate_local import MeanForecasting, NaiveForecasting, ThetaForecasting
+
+
+def create_simulated_panel(n_entities=4, n_periods=200):
+    frames = []
+    for entity in range(n_entities):
+        y = create_simulated_y(n_periods=n_periods - 10 * entity)
+        frames.append(
+            pd.DataFrame({"entity": entity, "date": y.index, "value": y.values})
+        )
+    return pd.concat(frames, ignore_index=True)
+
+
+@pytest.mark.parametrize("model_class", [MeanForecasting, NaiveForecasting])
+@pytest.mark.parametrize("step_size", [1, 3])
+def test_run_panel_matches_single_series_runs(model_class, step_size):
+    panel = create_simulated_panel()
+    panel_error_metrics = model_class.run_panel(
+        panel, step_size=step_size, n_forecasting=12
+    )
+    assert list(panel_error_metrics["y"]) == list(panel["entity"].unique())
+    for entity, entity_panel in panel.groupby("entity"):
+        y = entity_panel.set_index("date")["value"].rename("y")
+        model = model_class(y, step_size=step_size, n_forecasting=12)
+        model.run()
+        model.assess_error()
+        expected = model.get_error_metrics()
+        row = panel_error_metrics.loc[lambda df: df["y"] == entity].iloc[0]
+        for metric in METRICS.keys():
+            assert row[metric] == pytest.approx(expected[metric])
+
+
+def test_run_panel_requires_support():
+    with pytest.raises(NotImplementedError):
+        ThetaForecasting.run_panel(create_simulated_panel())
+
+
+def test_panel_dataset_entity_access():
+    frame = create_simulated_panel()
+    shuffled = frame.sample(frac=1, random_state=0)
+    panel = PanelDataset.from_frame(shuffled)
+    assert len(panel) == 4
+    assert list(panel.entity_offsets) == [0, 200, 390, 570, 740]
+    y = panel.get_y(2)
+    assert np.shares_memory(y.to_numpy(), panel.values)
+    expected = frame.loc[lambda df: df["entity"] == 2, "value"].to_numpy()
+    assert np.array_equal(y["2"].to_numpy(), expected)
+    dataset = panel.get_dataset(2)
+    assert dataset.time_frequency == "D"
+    model = NaiveForecasting.from_dataset(dataset, step_size=1, n_forecasting=12)
+    model.run()
+    assert len(model.y_pred) == 12
+    pd.testing.assert_frame_equal(panel.to_frame(), frame)
+    with pytest.raises(KeyError):
+        panel.get_y(10)
+    with pytest.raises(ValueError):
+        PanelDataset.from_frame(pd.concat([frame, frame.iloc[:1]]))
+
+
+def test_run_panel_accepts_panel_dataset(tmp_path):
+    frame = create_simulated_panel()
+    frame.to_parquet(tmp_path / "panel.parquet")
+    panel = PanelDataset.from_parquet(tmp_path / "panel.parquet")
+    error_metrics = NaiveForecasting.run_panel(panel, n_forecasting=12)
+    expected = NaiveForecasting.run_panel(frame, n_forecasting=12)
+    pd.testing.assert_frame_equal(
+        error_metrics.drop(columns=["id", "parquet_path"]),
+        expected.drop(columns=["id", "parquet_path"]),
+    )
+    assert (error_metrics["parquet_path"] == str(tmp_path / "panel.parquet")).all()
+    assert error_metrics["id"].is_unique
+
+
+def test_panel_dataset_from_parquet_filters(tmp_path):
+    frame = create_simulated_panel()
+    frame.to_parquet(tmp_path / "panel.parquet", row_group_size=50)
+    start, end = pd.Timestamp("2020-03-01"), pd.Timestamp("2020-05-31")
+    panel = PanelDataset.from_parquet(
+        tmp_path / "panel.parquet",
+        entities=[1, 3],
+        filter_start_date=start,
+        filter_end_date=end,
+    )
+    expected = frame[
+        frame["entity"].isin([1, 3]) & frame["date"].between(start, end)
+    ].reset_index(drop=True)
+    assert list(panel.entities) == [1, 3]
+    pd.testing.assert_frame_equal(panel.to_frame(), expected)
@@ -0,0 +1,85 @@
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from models.utils import create_simulated_y
+from models.racing import Race
+from models.univariate_local import MeanForecasting, NaiveForecasting
+from tests.utils import del_files
+
+
+def create_random_walk(n_periods=400, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {"y": rng.normal(size=n_periods).cumsum() * 10},
+        index=pd.date_range("2000-01-01", periods=n_periods, freq="D"),
+    )
+
+
+def test_race_stops_model_worse_than_baseline():
+    Race.reset_baseline_losses()
+    y = create_random_walk()
+    model = MeanForecasting(y, n_forecasting=200)
+    model.run(race=Race(NaiveForecasting))
+    assert model.is_censored
+    assert model.n_evaluated_divisions < 200
+    assert len(model.y_pred) == model.n_evaluated_divisions
+    assert model.y_true.index.is_monotonic_increasing
+    info = model.to_pandas()
+    assert info["censored"].iloc[0]
+    assert info["n_evaluated_divisions"].iloc[0] == model.n_evaluated_divisions
+
+
+@del_files
+def test_censored_results_are_not_treated_as_complete():
+    Race.reset_baseline_losses()
+    y = create_random_walk()
+    model = MeanForecasting(y, n_forecasting=200)
+    model.run(race=Race(NaiveForecasting))
+    assert model.is_censored
+    model.save(test_path=True)
+    rerun = MeanForecasting(y, n_forecasting=200)
+    assert not rerun.is_it_already_in_results(test_path=True)
+    rerun.run()
+    rerun.save(test_path=True)
+    assert rerun.is_it_already_in_results(test_path=True)
+
+
+def test_race_spends_error_rate_over_looks():
+    race = Race(confidence=0.95, min_divisions=2)
+    alphas = [race.get_look_alpha(look) for look in range(1, 100_000)]
+    assert np.all(np.diff(alphas) < 0)
+    assert sum(alphas) < 0.05
+    # A model equal to the baseline is rarely stopped, however many looks
+    rng = np.random.default_rng(0)
+    n_lost = 0
+    for _ in range(200):
+        differences = rng.normal(size=300)
+        n_lost += any(race.is_lost(differences[:n]) for n in range(2, 301))
+    assert n_lost / 200 <= 0.05
+
+
+def test_race_runs_every_division_when_not_lost():
+    Race.reset_baseline_losses()
+    y = create_simulated_y()
+    model = NaiveForecasting(y, n_forecasting=30, step_size=2)
+    model.run(race=Race(NaiveForecasting, order="newest"))
+    full = NaiveForecasting(y, n_forecasting=30, step_size=2)
+    full.run()
+    assert not model.is_censored
+    assert model.n_evaluated_divisions == 30
+    pd.testing.assert_frame_equal(model.y_pred, full.y_pred)
+    assert len(Race.baseline_losses) == 1
+
+
+def test_race_validation():
+    y = create_simulated_y()
+    model = NaiveForecasting(y, n_forecasting=12)
+    with pytest.raises(ValueError):
+        model.run(race=Race(), warm_start=True)
+    with pytest.raises(ValueError):
+        Race(order="sideways")
@@ -55,3 +55,26 @@ def test_multiple_steps_sarima():
     model.run()
     model.assess_error()
     model.save(test_path=True)
+
+
+def test_sarima_with_exogenous_regressors():
+    y = create_simulated_y()
+    X = create_simulated_X(n_features=2)
+    y = y + 3 * X["x0"]
+    model = SarimaForecasting(
+        y,
+        X,
+        filter_start_date="2022-01-01",
+        n_forecasting=3,
+        step_size=2,
+        max_p=1,
+        max_q=0,
+        max_d=0,
+        max_seasonal_p=0,
+        max_seasonal_q=0,
+        max_seasonal_d=0,
+    )
+    model.run()
+    assert model.fitted_model.model.k_exog == 2
+    model.assess_error()
+    assert model.get_error_metrics()["MSE"] < 3
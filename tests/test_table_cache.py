@@ -0,0 +1,50 @@
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from models.table_cache import TableCache, get_table_size
+
+
+def create_table(n_rows=1000):
+    return pd.DataFrame({"a": np.zeros(n_rows), "b": np.ones(n_rows)})
+
+
+def test_table_cache_evicts_least_recently_used():
+    table_size = get_table_size(create_table())
+    cache = TableCache(max_bytes=2 * table_size)
+    cache["first"] = create_table()
+    cache["second"] = create_table()
+    cache["first"]
+    cache["third"] = create_table()
+    assert list(cache) == ["first", "third"]
+    assert cache.get("second") is None
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 1, 1)
+    assert stats["n_bytes"] == 2 * table_size
+
+
+def test_table_cache_accepts_explicit_sizes():
+    cache = TableCache(max_bytes=100_000)
+    table = create_table()
+    cache.set("first", table, n_bytes=100)
+    cache["second"] = table
+    assert cache.get_stats()["n_bytes"] == 100 + get_table_size(table)
+
+
+def test_table_cache_keeps_pinned_tables():
+    table_size = get_table_size(create_table())
+    cache = TableCache(max_bytes=table_size)
+    cache["first"] = create_table()
+    with cache.pinned("first"):
+        cache["second"] = create_table()
+        assert "first" in cache and "second" not in cache
+        cache["third"] = create_table()
+        assert list(cache) == ["first"]
+    with pytest.raises(ValueError):
+        cache.unpin("first")
+    cache.set_max_bytes(0)
+    assert len(cache) == 0 and cache.n_bytes == 0
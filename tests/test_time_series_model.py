@@ -1,12 +1,17 @@
 import pytest
 import pandas as pd
+import numpy as np
 import sys
 import os
+import warnings
+from statsmodels.tools.sm_exceptions import ConvergenceWarning
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
 
 from models.utils import create_simulated_X, create_simulated_y
 from models.time_series_model import TimeSeriesModel
+from models.dataset import Dataset
+from models.univariate_local import NaiveForecasting, SarimaForecasting
 
 
 def test_instanciate_time_series_model():
@@ -81,6 +86,245 @@ def test_create_divisions_with_intersection():
     model.divisions[0]
 
 
+def test_divisions_are_views_of_dataset():
+    y = create_simulated_y()
+    X = create_simulated_X()
+    model = TimeSeriesModel(y, X, n_forecasting=12, step_size=3)
+    model.build_divisions()
+    for division in model.divisions.values():
+        training, forecasting = division["training"], division["forecasting"]
+        assert np.shares_memory(training.y.values, model.y.values)
+        assert np.shares_memory(forecasting.y.values, model.y.values)
+        assert np.shares_memory(forecasting.X.values, model.X.values)
+        assert forecasting.X.index.equals(forecasting.y.index)
+        assert len(forecasting.y) == 3
+
+
+def test_iter_divisions_matches_build_divisions():
+    y = create_simulated_y()
+    model = TimeSeriesModel(y, forecasting_start_date="2022-08-01", step_size=4)
+    info = model.to_pandas()
+    assert model.divisions == {}
+    model.build_divisions()
+    divisions = list(model.iter_divisions())
+    assert len(divisions) == len(model.divisions) == info["n_forecasting"].iloc[0]
+    for division, built_division in zip(divisions, model.divisions.values()):
+        assert division["forecasting"].y.index.equals(
+            built_division["forecasting"].y.index
+        )
+    assert (
+        divisions[0]["forecasting"].y.index[0] == info["forecasting_start_date"].iloc[0]
+    )
+    assert (
+        divisions[-1]["forecasting"].y.index[-1]
+        == info["forecasting_last_date"].iloc[0]
+    )
+
+
+def test_parallel_run_matches_sequential_run():
+    y = create_simulated_y()
+    sequential = NaiveForecasting(y, n_forecasting=12, step_size=2)
+    sequential.run()
+    parallel = NaiveForecasting(y, n_forecasting=12, step_size=2)
+    parallel.run(n_jobs=2)
+    pd.testing.assert_frame_equal(sequential.y_pred, parallel.y_pred)
+    pd.testing.assert_frame_equal(sequential.y_true, parallel.y_true)
+
+
+def test_run_predictions_only_last_of_each_intersection():
+    y = create_simulated_y()
+    model = NaiveForecasting(
+        y,
+        n_forecasting=20,
+        step_size=5,
+        intersect_forecasting=True,
+        only_consider_last_of_each_intersection=True,
+    )
+    model.run()
+    assert len(model.y_pred) == len(model.y_true) == 20
+    assert model.y_pred.index.equals(model.y.index[-20:])
+    assert model.y_pred.index.is_unique
+    assert model.y_pred.iloc[-1, 0] == model.y.iloc[-6, 0]
+
+
+def test_create_divisions_rolling():
+    y = create_simulated_y()
+    model = TimeSeriesModel(y, n_forecasting=12, step_size=2, rolling=True)
+    model.build_divisions()
+    window_length = model.get_window_length()
+    assert window_length == len(y) - 24
+    for division in model.divisions.values():
+        assert len(division["training"].y) == window_length
+        assert np.shares_memory(division["training"].y.values, model.y.values)
+    model = TimeSeriesModel(
+        y, n_forecasting=12, step_size=2, rolling=True, window_length=100
+    )
+    model.build_divisions()
+    for division in model.divisions.values():
+        training, forecasting = division["training"], division["forecasting"]
+        assert len(training.y) == 100
+        assert training.y.index[-1] + pd.Timedelta(days=1) == forecasting.y.index[0]
+    with pytest.raises(ValueError):
+        TimeSeriesModel(y, n_forecasting=12, window_length=100)
+
+
+def test_forecasting_windows_with_intersection():
+    y = create_simulated_y()
+    model = TimeSeriesModel(
+        y, n_forecasting=50, step_size=5, intersect_forecasting=True
+    )
+    windows = model.get_forecasting_windows()
+    assert windows.shape == (50, 5, 1)
+    assert np.shares_memory(windows, model.y.values)
+    for window, division in zip(windows, model.iter_divisions()):
+        assert np.array_equal(window, division["forecasting"].y.values)
+
+
+def test_divisions_are_compact_records():
+    y = create_simulated_y(n_periods=1e4)
+    model = TimeSeriesModel(y, n_forecasting=5000, step_size=1)
+    model.build_divisions()
+    assert model.divisions.offsets.nbytes == 5000 * 24
+    division = model.divisions[4999]
+    assert not hasattr(division, "__dict__")
+    assert division.forecasting_end == len(y)
+    assert division["forecasting"].y.index[0] == y.index[-1]
+    with pytest.raises(KeyError):
+        model.divisions[5000]
+    rolling_model = TimeSeriesModel(
+        y, n_forecasting=50, step_size=3, rolling=True, window_length=100
+    )
+    offsets = rolling_model.get_division_offsets()
+    for idx in [0, 17, 49]:
+        division = rolling_model._get_division(idx)
+        assert (
+            division.training_start,
+            division.forecasting_start,
+            division.forecasting_end,
+        ) == offsets[idx].item()
+
+
+@pytest.mark.parametrize("sampling", ["even", "stratified"])
+def test_sampled_divisions(sampling):
+    y = create_simulated_y(n_periods=1000)
+    full = NaiveForecasting(y, n_forecasting=200, step_size=2)
+    full.run()
+    sampled = NaiveForecasting(y, n_forecasting=200, step_size=2)
+    sampled.build_divisions(n_samples=20, sampling=sampling, seed=1)
+    assert len(sampled.divisions) == 20
+    sampled.run()
+    assert len(sampled.y_pred) == 40
+    assert not sampled.is_censored
+    pd.testing.assert_frame_equal(sampled.y_pred, full.y_pred.loc[sampled.y_pred.index])
+    mse = sampled.get_error_metrics()["MSE"]
+    lower, upper = sampled.error_metrics.get_confidence_intervals()["MSE"]
+    assert lower <= mse <= upper
+    frame = sampled.get_error_metrics_frame()
+    assert {"MSE_lower", "MSE_upper", "RMSE_upper"} <= set(frame.columns)
+    assert sampled.get_fingerprint() != full.get_fingerprint()
+    for idx in [0, 3, 19]:
+        assert sampled.get_forecasting_div(idx).y.index.equals(
+            sampled.divisions[idx].forecasting.y.index
+        )
+        assert sampled.get_training_div(idx).y.index.equals(
+            sampled.divisions[idx].training.y.index
+        )
+
+
+def test_sample_divisions_validation():
+    assert list(TimeSeriesModel.sample_divisions(10, 4)) == [0, 3, 6, 9]
+    with pytest.raises(ValueError):
+        TimeSeriesModel.sample_divisions(10, 11)
+    with pytest.raises(ValueError):
+        TimeSeriesModel.sample_divisions(10, 4, sampling="clustered")
+
+
+def test_X_is_aligned_to_y_once():
+    y = create_simulated_y()
+    X = create_simulated_X().iloc[::-1]
+    model = TimeSeriesModel(y, X, filter_start_date="2021-01-01", n_forecasting=12)
+    assert model.X.index.equals(model.y.index)
+    X_values = model.dataset.get_X_values()
+    division = next(model.iter_divisions())
+    assert np.shares_memory(division.training.get_X_values(), X_values)
+    assert np.array_equal(
+        division.forecasting.get_X_values(),
+        X.loc[division.forecasting.y.index].to_numpy(),
+    )
+    model.dataset.set_X(X.iloc[:, :2])
+    assert model.X.shape == (len(model.y), 2)
+    # Dates of y missing from X are kept as missing rows, which are only
+    # rejected by run for models that read X
+    model = NaiveForecasting(y, X.drop(y.index[:10]), n_forecasting=12)
+    assert model.X.iloc[:10].isna().all().all()
+    model.run()
+    assert len(model.y_pred) == 12
+    model = SarimaForecasting(y, X.drop(y.index[:10]), n_forecasting=12)
+    with pytest.raises(ValueError):
+        model.run()
+    with pytest.raises(ValueError):
+        Dataset(y, X.drop(y.index[:10]), strict_X=True)
+
+
+def test_memmap_dataset(tmp_path):
+    y = create_simulated_y()
+    X = create_simulated_X(n_features=2)
+    model = NaiveForecasting(y, X, n_forecasting=12, step_size=2)
+    model.dataset.to_memmap(tmp_path / "dataset")
+    dataset = Dataset.from_memmap(tmp_path / "dataset")
+    assert isinstance(dataset.get_X_values(), np.memmap)
+    # Read-only as the values are views of the files mapped in read mode
+    assert not dataset.y.to_numpy().flags.writeable
+    assert not dataset.view(10, 20).X.to_numpy().flags.writeable
+    pd.testing.assert_frame_equal(dataset.y, model.y, check_freq=False)
+    pd.testing.assert_frame_equal(dataset.X, model.X, check_freq=False)
+    assert dataset.get_fingerprint() == model.dataset.get_fingerprint()
+    memmap_model = NaiveForecasting.from_dataset(dataset, n_forecasting=12, step_size=2)
+    model.run()
+    memmap_model.run(n_jobs=2)
+    pd.testing.assert_frame_equal(memmap_model.y_pred, model.y_pred, check_freq=False)
+
+
+class AllocatingForecasting(NaiveForecasting):
+    def fit(self, y, X=None):
+        if len(y) % 2:
+            buffer = np.ones(2 * 1024**2)
+            del buffer
+        for _ in range(2):
+            warnings.warn("Did not converge.", ConvergenceWarning)
+        super().fit(y, X)
+
+
+def test_telemetry_is_measured_per_division():
+    y = create_simulated_y(n_periods=200)
+    model = AllocatingForecasting(y, n_forecasting=6)
+    model.run(trace_memory=True)
+    telemetry = model.telemetry
+    is_allocating = np.array(
+        [len(division.training.y) % 2 == 1 for division in model.iter_divisions()]
+    )
+    assert (telemetry["peak_memory_mb"][is_allocating] > 15).all()
+    assert (telemetry["peak_memory_mb"][~is_allocating] < 1).all()
+    assert (telemetry["n_convergence_warnings"] == 2).all()
+    model.run()
+    assert model.telemetry["peak_memory_mb"].isna().all()
+
+
+def test_organize_time_series_fast_path():
+    y = create_simulated_y(to_frame=True)
+    assert Dataset.organize_time_series(y, None, None) is y
+    filtered = Dataset.organize_time_series(
+        y, pd.Timestamp("2021-01-01"), pd.Timestamp("2021-06-30")
+    )
+    pd.testing.assert_frame_equal(filtered, y.loc["2021-01-01":"2021-06-30"])
+    assert np.shares_memory(filtered.values, y.values)
+    shuffled = y.sample(frac=1, random_state=0).reset_index(names="date")
+    organized = Dataset.organize_time_series(shuffled, None, None)
+    pd.testing.assert_frame_equal(organized, y, check_freq=False, check_names=False)
+    with pytest.raises(ValueError):
+        Dataset.organize_time_series(pd.concat([y, y.iloc[:2]]), None, None)
+
+
 if __name__ == "__main__":
     test_different_n_forecasting()
     test_create_divisions()
@@ -0,0 +1,58 @@
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from models.utils import create_simulated_y
+from models.time_series_model import TimeSeriesModel
+from models.univariate_local import (
+    HoltWintersForecasting,
+    MeanForecasting,
+    NaiveForecasting,
+    SarimaForecasting,
+    ThetaForecasting,
+)
+
+
+@pytest.mark.parametrize("model_class", [MeanForecasting, NaiveForecasting])
+def test_warm_start_matches_full_fit(model_class):
+    y = create_simulated_y()
+    cold = model_class(y, n_forecasting=12, step_size=2)
+    cold.run()
+    warm = model_class(y, n_forecasting=12, step_size=2)
+    warm.run(warm_start=True)
+    pd.testing.assert_frame_equal(cold.y_pred, warm.y_pred)
+
+
+def test_warm_start_statsmodels_models():
+    y = create_simulated_y(n_periods=300)
+    models = [
+        HoltWintersForecasting(y, n_forecasting=4, time_frequency="D"),
+        ThetaForecasting(y, n_forecasting=4),
+        SarimaForecasting(
+            y,
+            n_forecasting=4,
+            max_p=1,
+            max_q=0,
+            max_d=0,
+            max_seasonal_p=0,
+            max_seasonal_q=0,
+            max_seasonal_d=0,
+        ),
+    ]
+    for model in models:
+        model.run(warm_start=True)
+        assert len(model.y_pred) == 4
+        assert np.isfinite(model.y_pred.values).all()
+
+
+def test_warm_start_requires_update():
+    y = create_simulated_y()
+    assert not TimeSeriesModel.supports_update()
+    assert NaiveForecasting.supports_update()
+    model = NaiveForecasting(y, n_forecasting=12)
+    with pytest.raises(ValueError):
+        model.run(n_jobs=2, warm_start=True)
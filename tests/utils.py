@@ -1,5 +1,6 @@
 from models.time_series_model import TEST_PATH_TIME_SERIES_MODELS_RESULTS
 from models.error_metrics import TEST_PATH_ERROR_METRICS_RESULTS
+from models.results_store import ResultsStore
 import os
 import functools
 
@@ -9,6 +10,7 @@ def del_test_files():
         os.remove(TEST_PATH_TIME_SERIES_MODELS_RESULTS)
     if os.path.exists(TEST_PATH_ERROR_METRICS_RESULTS):
         os.remove(TEST_PATH_ERROR_METRICS_RESULTS)
+    ResultsStore.reset_stores()
     return True
 
 